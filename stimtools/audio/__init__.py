@@ -1,5 +1,13 @@
-from ._tone import pure_tone
-from ._noise import pink_noise, white_noise
+from ._tone import pure_tone, complex_tone
+from ._noise import (
+    pink_noise,
+    white_noise,
+    pink_noise_blocks,
+    white_noise_blocks,
+    pink_noise_tokens,
+    band_noise,
+    band_noise_blocks,
+)
 from ._ops import (
     convolve,
     amp_to_rms,
@@ -9,29 +17,67 @@ from ._ops import (
     sone_to_phon,
 )
 from ._nb import nb_player
-from ._stats import rms_over_time
-from ._io import (save, load)
-from ._calib import fit_rms_db_measurements, rms_to_db_from_coefs, db_to_rms_from_coefs
-from ._tvl import compute_tvl
-from ._roomeqwizard import parse_roomeqwizard_ir_stats_file
+from ._stats import rms_over_time, RmsTracker
+from ._io import save, load, load_blocks, WavWriter
+from ._calib import (
+    fit_rms_db_measurements,
+    rms_to_db_from_coefs,
+    db_to_rms_from_coefs,
+    Calibration,
+)
+from ._tvl import compute_tvl, compute_tvl_batch
+from ._roomeqwizard import (
+    parse_roomeqwizard_ir_stats_file,
+    parse_roomeqwizard_ir_stats_dir,
+)
+from ._cache import TokenCache
+from ._prefetch import StimulusQueue
+from ._conv import PartitionedConvolver, convolve_batch
+from ._resample import resample, Resampler
+from ._bank import StimulusBank
+from ._qa import qa_report, analyse_waveform
+from ._gammatone import erbspace, GammatoneFilterbank
 
 __all__ = [
     "pure_tone",
+    "complex_tone",
     "pink_noise",
     "white_noise",
+    "pink_noise_blocks",
+    "white_noise_blocks",
+    "pink_noise_tokens",
+    "band_noise",
+    "band_noise_blocks",
     "convolve",
     "amp_to_rms",
     "rms_to_amp",
     "nb_player",
     "rms_over_time",
+    "RmsTracker",
     "save",
     "load",
+    "load_blocks",
+    "WavWriter",
     "fit_rms_db_measurements",
     "rms_to_db_from_coefs",
     "db_to_rms_from_coefs",
+    "Calibration",
     "rms_to_db",
     "compute_tvl",
+    "compute_tvl_batch",
     "phon_to_sone",
     "sone_to_phon",
     "parse_roomeqwizard_ir_stats_file",
+    "parse_roomeqwizard_ir_stats_dir",
+    "TokenCache",
+    "StimulusQueue",
+    "PartitionedConvolver",
+    "convolve_batch",
+    "resample",
+    "Resampler",
+    "StimulusBank",
+    "qa_report",
+    "analyse_waveform",
+    "erbspace",
+    "GammatoneFilterbank",
 ]
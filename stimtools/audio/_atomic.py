@@ -0,0 +1,47 @@
+import contextlib
+import os
+import pathlib
+import threading
+
+
+@contextlib.contextmanager
+def atomic_write(path, mode="wb"):
+    """Opens a file for writing such that other readers (and writers) never
+    see it partially written.
+
+    The contents are written to a temporary file alongside `path`, which is
+    unique to the process and thread, and which replaces `path` once the
+    block exits without an error.
+
+    Parameters
+    ----------
+    path: string or pathlib.Path
+        Path of the file to write.
+    mode: string, {"wb", "w"}, optional
+        Mode to open the temporary file with.
+
+    Examples
+    --------
+    >>> with atomic_write(path="token.npy") as token_file:
+    ...     np.save(token_file, y)
+
+    """
+
+    path = pathlib.Path(path)
+
+    temp_path = path.with_name(
+        f"{path.name}.{os.getpid():d}.{threading.get_ident():d}.tmp"
+    )
+
+    try:
+        with open(temp_path, mode) as temp_file:
+            yield temp_file
+
+        os.replace(temp_path, path)
+
+    except BaseException:
+        try:
+            temp_path.unlink()
+        except FileNotFoundError:
+            pass
+        raise
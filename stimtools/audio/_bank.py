@@ -0,0 +1,336 @@
+import json
+import pathlib
+import shutil
+import uuid
+
+import numpy as np
+
+import soundfile
+
+from ._atomic import atomic_write
+from ._dtype import working_dtype, from_float, to_float
+
+
+# change this if the layout of the bank files changes
+BANK_VERSION = 2
+
+DATA_FILENAME = "data.npy"
+INDEX_FILENAME = "index.json"
+
+# file containing the name of the subdirectory that holds the current version
+# of the bank's data and index
+CURRENT_FILENAME = "current"
+VERSION_DIR_PREFIX = "version_"
+
+
+class StimulusBank:
+    def __init__(self, bank_dir):
+        """A set of waveforms stored in a single file, from which any waveform
+        can be accessed without reading the others.
+
+        The waveforms are stored back-to-back in one contiguous float32 or int16
+        ``.npy`` file, alongside a JSON index of the offset, shape, sample rate,
+        and metadata of each. Waveforms are returned as read-only
+        memory-mapped views, so opening a bank is fast even if it is large or
+        on a network share.
+
+        Each time a bank is written, its data and index are put in a new
+        subdirectory and the bank is then switched to it in a single step, so
+        a bank is never seen partially written or with an index that doesn't
+        match its data.
+
+        Parameters
+        ----------
+        bank_dir: string or pathlib.Path
+            Directory containing the bank, as made by ``from_arrays`` or
+            ``from_dir``.
+
+        Examples
+        --------
+        >>> bank = StimulusBank.from_dir(bank_dir="bank", wav_dir="stimuli")
+        >>> bank = StimulusBank(bank_dir="bank")
+        >>> waveform = bank["tone_1000Hz"]
+
+        """
+
+        self.bank_dir = pathlib.Path(bank_dir)
+
+        while True:
+
+            version_dir = _current_version_dir(bank_dir=self.bank_dir)
+
+            try:
+                with open(version_dir / INDEX_FILENAME, "r") as index_file:
+                    index = json.load(index_file)
+
+                data = np.load(version_dir / DATA_FILENAME, mmap_mode="r")
+
+            except FileNotFoundError:
+                # the bank may have been rewritten, and this version removed,
+                # since its name was read
+                if _current_version_dir(bank_dir=self.bank_dir) == version_dir:
+                    raise
+
+            else:
+                break
+
+        if index["version"] != BANK_VERSION:
+            raise ValueError("Bank was made with an incompatible version")
+
+        self._index = index["stimuli"]
+
+        self._data = data
+
+    @property
+    def ids(self):
+        """Identifiers of the waveforms, in the order that they are stored."""
+        return list(self._index)
+
+    @property
+    def dtype(self):
+        return self._data.dtype
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, stim_id):
+        return stim_id in self._index
+
+    def __iter__(self):
+        return iter(self._index)
+
+    def __getitem__(self, stim_id):
+        return self.get(stim_id=stim_id)
+
+    def get(self, stim_id, with_sr=False):
+        """Returns a waveform from the bank.
+
+        Parameters
+        ----------
+        stim_id: string
+            Identifier of the waveform.
+        with_sr: bool, optional
+            Whether to also return the sample rate.
+
+        Returns
+        -------
+        waveform: read-only memory-mapped numpy array
+            The waveform, with the shape that it was stored with.
+        sr: int
+            Sample rate; only returned if `with_sr` is ``True``.
+
+        """
+
+        info = self._index[stim_id]
+
+        offset = info["offset"]
+
+        waveform = self._data[offset : (offset + int(np.prod(info["shape"])))]
+
+        waveform = waveform.reshape(info["shape"])
+
+        if with_sr:
+            return (waveform, info["sr"])
+        else:
+            return waveform
+
+    def sr(self, stim_id):
+        """Sample rate of a waveform."""
+        return self._index[stim_id]["sr"]
+
+    def metadata(self, stim_id):
+        """Metadata that was stored with a waveform."""
+        return self._index[stim_id]["metadata"]
+
+    @classmethod
+    def from_arrays(cls, bank_dir, waveforms, sr, metadata=None, dtype="float32"):
+        """Makes a bank from waveforms in memory.
+
+        Parameters
+        ----------
+        bank_dir: string or pathlib.Path
+            Directory to write the bank to; created if it doesn't exist, and
+            any existing bank is overwritten.
+        waveforms: dict
+            Waveforms (values; 1D or number of samples x channels) by
+            identifier (keys).
+        sr: int or dict
+            Sample rate; either the same for all waveforms, or per identifier.
+        metadata: dict or None, optional
+            JSON-serialisable information to store with each waveform, by
+            identifier.
+        dtype: string or numpy dtype, {"float32", "int16"}, optional
+            Data type of the stored waveforms. Float waveforms are clipped and
+            quantised if this is "int16".
+
+        Returns
+        -------
+        bank: StimulusBank instance
+
+        """
+
+        waveforms = {
+            str(stim_id): np.asarray(waveform)
+            for (stim_id, waveform) in waveforms.items()
+        }
+
+        shapes = {stim_id: waveform.shape for (stim_id, waveform) in waveforms.items()}
+
+        def read(stim_id):
+            return from_float(
+                waveform=to_float(waveform=waveforms[stim_id]), dtype=dtype
+            )
+
+        return cls._write(
+            bank_dir=bank_dir,
+            shapes=shapes,
+            read=read,
+            srs=_per_stim(value=sr, stim_ids=shapes),
+            metadata=_per_stim(value=metadata, stim_ids=shapes),
+            dtype=dtype,
+        )
+
+    @classmethod
+    def from_dir(
+        cls, bank_dir, wav_dir, pattern="*.wav", metadata=None, dtype="float32"
+    ):
+        """Makes a bank from the audio files in a directory, reading one file at
+        a time.
+
+        Parameters
+        ----------
+        bank_dir: string or pathlib.Path
+            Directory to write the bank to.
+        wav_dir: string or pathlib.Path
+            Directory containing the audio files. The identifier of each
+            waveform is its filename, without the extension.
+        pattern: string, optional
+            Glob pattern that identifies the audio files.
+        metadata, dtype:
+            See ``from_arrays``.
+
+        Returns
+        -------
+        bank: StimulusBank instance
+
+        """
+
+        wav_paths = {
+            wav_path.stem: wav_path
+            for wav_path in sorted(pathlib.Path(wav_dir).glob(pattern))
+        }
+
+        infos = {
+            stim_id: soundfile.info(str(wav_path))
+            for (stim_id, wav_path) in wav_paths.items()
+        }
+
+        shapes = {
+            stim_id: (
+                (info.frames,) if info.channels == 1 else (info.frames, info.channels)
+            )
+            for (stim_id, info) in infos.items()
+        }
+
+        def read(stim_id):
+            (waveform, _) = soundfile.read(file=wav_paths[stim_id], dtype=str(dtype))
+            return waveform
+
+        return cls._write(
+            bank_dir=bank_dir,
+            shapes=shapes,
+            read=read,
+            srs={stim_id: info.samplerate for (stim_id, info) in infos.items()},
+            metadata=_per_stim(value=metadata, stim_ids=shapes),
+            dtype=dtype,
+        )
+
+    @classmethod
+    def _write(cls, bank_dir, shapes, read, srs, metadata, dtype):
+
+        dtype = np.dtype(dtype)
+
+        # check that it is a supported type
+        working_dtype(dtype)
+
+        if dtype == np.float64:
+            raise ValueError("Banks can only be stored as float32 or int16")
+
+        bank_dir = pathlib.Path(bank_dir)
+        bank_dir.mkdir(parents=True, exist_ok=True)
+
+        index = {}
+
+        offset = 0
+
+        for (stim_id, shape) in shapes.items():
+
+            index[stim_id] = {
+                "offset": offset,
+                "shape": list(shape),
+                "sr": int(srs[stim_id]),
+                "metadata": metadata[stim_id],
+            }
+
+            offset += int(np.prod(shape))
+
+        # the new version is written alongside the current one, which stays
+        # readable until the bank is switched over to the new version
+        version_dir = bank_dir / (VERSION_DIR_PREFIX + uuid.uuid4().hex)
+        version_dir.mkdir()
+
+        data = np.lib.format.open_memmap(
+            version_dir / DATA_FILENAME, mode="w+", dtype=dtype, shape=(offset,)
+        )
+
+        for (stim_id, info) in index.items():
+
+            waveform = read(stim_id)
+
+            if waveform.shape != shapes[stim_id]:
+                raise ValueError(f"Unexpected shape for `{stim_id}`")
+
+            data[info["offset"] : (info["offset"] + waveform.size)] = waveform.ravel()
+
+        data.flush()
+
+        del data
+
+        with open(version_dir / INDEX_FILENAME, "w") as index_file:
+            json.dump({"version": BANK_VERSION, "stimuli": index}, index_file)
+
+        try:
+            old_version_dir = _current_version_dir(bank_dir=bank_dir)
+        except FileNotFoundError:
+            old_version_dir = None
+
+        # the switch to the new version is a single atomic replacement of the
+        # pointer file
+        with atomic_write(path=bank_dir / CURRENT_FILENAME, mode="w") as current_file:
+            current_file.write(version_dir.name)
+
+        # readers that already have the old version open keep their views of
+        # it; if the files can't be removed (e.g., on Windows), they are left
+        if old_version_dir is not None and old_version_dir != version_dir:
+            shutil.rmtree(old_version_dir, ignore_errors=True)
+
+        return cls(bank_dir=bank_dir)
+
+
+def _current_version_dir(bank_dir):
+    """Subdirectory holding the current version of a bank."""
+
+    with open(bank_dir / CURRENT_FILENAME, "r") as current_file:
+        version_name = current_file.read().strip()
+
+    return bank_dir / version_name
+
+
+def _per_stim(value, stim_ids):
+    """A value for each identifier, from either a dict or a common value."""
+
+    if isinstance(value, dict):
+        value = {str(stim_id): stim_value for (stim_id, stim_value) in value.items()}
+        return {stim_id: value.get(stim_id) for stim_id in stim_ids}
+
+    return {stim_id: value for stim_id in stim_ids}
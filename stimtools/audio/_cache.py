@@ -0,0 +1,192 @@
+import hashlib
+import inspect
+import json
+import os
+import pathlib
+
+import numpy as np
+
+from ._atomic import atomic_write
+from ._noise import pink_noise, white_noise
+
+
+# change this if the generators change in a way that alters their output, so
+# that existing cache entries are no longer used
+CACHE_VERSION = 1
+
+
+class TokenCache:
+    def __init__(self, cache_dir, max_bytes=None):
+        """On-disk cache of seeded noise waveforms ('frozen' noise tokens).
+
+        Each waveform is stored as a ``.npy`` file named by a hash of the
+        generator and all its parameters (including the seed), and is returned
+        as a read-only memory-mapped array.
+
+        Parameters
+        ----------
+        cache_dir: string or pathlib.Path
+            Directory to store the waveforms in; created if it doesn't exist.
+        max_bytes: int or None, optional
+            If provided, the least-recently used waveforms are removed when the
+            cache grows beyond this size.
+
+        Examples
+        --------
+        >>> cache = TokenCache(cache_dir="noise_cache")
+        >>> y = cache.pink_noise(dur_s=1.0, rms=0.05, seed=3)
+
+        """
+
+        self.cache_dir = pathlib.Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        self.max_bytes = max_bytes
+
+        self._generators = {"pink_noise": pink_noise, "white_noise": white_noise}
+
+    def pink_noise(self, **params):
+        """Cached equivalent of ``stimtools.audio.pink_noise``."""
+        return self.get(generator="pink_noise", **params)
+
+    def white_noise(self, **params):
+        """Cached equivalent of ``stimtools.audio.white_noise``."""
+        return self.get(generator="white_noise", **params)
+
+    def get(self, generator, **params):
+        """Returns a waveform from the cache, generating (and storing) it if it
+        is not already present.
+
+        Parameters
+        ----------
+        generator: string, {"pink_noise", "white_noise"}
+            Name of the generator function.
+        params: keyword arguments
+            Arguments to the generator function. Needs to include a `seed`.
+
+        Returns
+        -------
+        y: read-only memory-mapped numpy array
+            The waveform.
+
+        """
+
+        if params.get("seed") is None:
+            raise ValueError("Only waveforms with a `seed` can be cached")
+
+        if params.get("filename") is not None or params.get("rand") is not None:
+            raise ValueError("Cannot cache waveforms with `filename` or `rand`")
+
+        key = self.key(generator=generator, **params)
+
+        token_path = self.cache_dir / (key + ".npy")
+
+        try:
+            y = np.load(token_path, mmap_mode="r")
+
+        except FileNotFoundError:
+
+            y = self._generators[generator](**params)
+
+            # other processes never see a partially-written token
+            with atomic_write(path=token_path) as token_file:
+                np.save(token_file, y)
+
+            self.evict(keep=[token_path])
+
+            y = np.load(token_path, mmap_mode="r")
+
+        else:
+            # mark as recently used
+            os.utime(token_path)
+
+        return y
+
+    def key(self, generator, **params):
+        """Hash of a generator and its full set of parameters."""
+
+        signature = inspect.signature(self._generators[generator])
+
+        bound = signature.bind(**params)
+        bound.apply_defaults()
+
+        description = json.dumps(
+            {
+                "version": CACHE_VERSION,
+                "generator": generator,
+                "params": {
+                    name: _key_value(name=name, value=value)
+                    for (name, value) in bound.arguments.items()
+                },
+            },
+            sort_keys=True,
+            default=repr,
+        )
+
+        return hashlib.sha1(description.encode("utf8")).hexdigest()
+
+    def evict(self, keep=()):
+        """Removes the least-recently used waveforms until the cache is within
+        its size limit.
+
+        Parameters
+        ----------
+        keep: sequence of pathlib.Path, optional
+            Paths that are not to be removed.
+
+        """
+
+        if self.max_bytes is None:
+            return
+
+        token_stats = sorted(
+            (
+                (token_path.stat(), token_path)
+                for token_path in self.cache_dir.glob("*.npy")
+            ),
+            key=lambda stat_path: stat_path[0].st_mtime,
+        )
+
+        total_bytes = sum(token_stat.st_size for (token_stat, _) in token_stats)
+
+        for (token_stat, token_path) in token_stats:
+
+            if total_bytes <= self.max_bytes:
+                break
+
+            if token_path in keep:
+                continue
+
+            try:
+                token_path.unlink()
+            except FileNotFoundError:
+                pass
+
+            total_bytes -= token_stat.st_size
+
+    def clear(self):
+        """Removes all waveforms from the cache."""
+
+        for token_path in self.cache_dir.glob("*.npy"):
+            token_path.unlink()
+
+
+def _key_value(name, value):
+    """A JSON-serialisable form of a generator parameter, in which equivalent
+    values (e.g., "float32" and ``np.float32``, or 1 and 1.0) are the same."""
+
+    if name == "dtype" or isinstance(value, (type, np.dtype)):
+        return np.dtype(value).str
+
+    if isinstance(value, (int, float, np.ndarray, np.generic, list, tuple)):
+
+        value = np.asarray(value)
+
+        # numbers that are equal give the same waveform (e.g., `dur_s` of 1 and
+        # 1.0), so they are hashed as floats
+        if value.dtype.kind in "iuf":
+            value = value.astype(float)
+
+        return value.tolist()
+
+    return value
@@ -62,16 +62,236 @@ def db_to_rms_from_coefs(db, coefs):
 
     """
 
-    p = np.poly1d(coefs)
+    (slope, intercept) = coefs
 
-    try:
-        db = list(db)
-    except TypeError:
-        db = [db]
-
-    rms = np.array([10 ** ((p - curr_db).roots[0]) for curr_db in db])
+    rms = 10 ** ((np.atleast_1d(np.array(db, dtype=float)) - intercept) / slope)
 
     if rms.size == 1:
-        rms = rms[0]
+        rms = rms.ravel()[0]
 
     return rms
+
+
+class Calibration:
+    def __init__(self, coefs, freqs=None):
+        """Relationship between waveform RMS and dB SPL, for each channel and
+        (optionally) a set of frequencies.
+
+        Parameters
+        ----------
+        coefs: array of floats
+            Polynomial coefficients, as returned by ``fit_rms_db_measurements``.
+            Either (2,) for a single channel and frequency, (number of channels
+            x 2), or (number of frequencies x number of channels x 2).
+        freqs: sequence of floats or None, optional
+            Frequencies (in Hz) corresponding to the first axis of `coefs`.
+
+        Notes
+        -----
+        * Conversions are done in closed form and are vectorised over arrays of
+          levels (and frequencies).
+        * The coefficients are interpolated linearly over log-frequency between
+          the calibrated frequencies, and are constant beyond them.
+
+        Examples
+        --------
+        >>> calib = Calibration.from_measurements(
+        ...     rms=test_rms, db=measured_db, freqs=test_freqs
+        ... )
+        >>> calib.save("calib.npz")
+        >>> calib = Calibration.load("calib.npz")
+        >>> trial_rms = calib.db_to_rms(db=trial_db, freq=trial_freqs, channel=0)
+
+        """
+
+        coefs = np.array(coefs, dtype=float)
+
+        if coefs.ndim == 1:
+            coefs = coefs[np.newaxis, :]
+
+        if coefs.ndim == 2:
+            coefs = coefs[np.newaxis, :, :]
+
+        if coefs.ndim != 3 or coefs.shape[-1] != 2:
+            raise ValueError("Unexpected shape for `coefs`")
+
+        (n_freqs, self.n_channels, _) = coefs.shape
+
+        if freqs is None:
+            if n_freqs != 1:
+                raise ValueError("Need `freqs` when there are multiple frequencies")
+        else:
+            freqs = np.array(freqs, dtype=float)
+
+            if freqs.shape != (n_freqs,):
+                raise ValueError("Need one item in `freqs` per frequency")
+
+            i_sort = np.argsort(freqs)
+
+            (freqs, coefs) = (freqs[i_sort], coefs[i_sort, ...])
+
+        self.coefs = coefs
+        self.freqs = freqs
+
+    @classmethod
+    def from_measurements(cls, rms, db, freqs=None):
+        """Creates a calibration by fitting RMS and dB SPL measurements.
+
+        Parameters
+        ----------
+        rms: 1D array of floats
+            The waveform RMS of each measurement level.
+        db: array of floats
+            Measured dB SPL levels; either (number of levels,), (number of
+            levels x number of channels), or (number of frequencies x number of
+            levels x number of channels).
+        freqs: sequence of floats or None, optional
+            Frequencies (in Hz) corresponding to the first axis of a 3D `db`.
+
+        Returns
+        -------
+        calib: Calibration instance
+
+        """
+
+        db = np.array(db, dtype=float)
+
+        if db.ndim == 1:
+            db = db[:, np.newaxis]
+
+        if db.ndim == 2:
+            db = db[np.newaxis, :, :]
+
+        (n_freqs, _, n_channels) = db.shape
+
+        coefs = np.array(
+            [
+                [
+                    fit_rms_db_measurements(rms=rms, db=db[i_freq, :, i_channel])
+                    for i_channel in range(n_channels)
+                ]
+                for i_freq in range(n_freqs)
+            ]
+        )
+
+        return cls(coefs=coefs, freqs=freqs)
+
+    @classmethod
+    def load(cls, path):
+        """Loads a calibration saved with ``save``."""
+
+        with np.load(path) as calib_file:
+            coefs = calib_file["coefs"]
+            freqs = calib_file["freqs"] if "freqs" in calib_file else None
+
+        return cls(coefs=coefs, freqs=freqs)
+
+    def save(self, path):
+        """Saves the calibration to a ``.npz`` file."""
+
+        if self.freqs is None:
+            np.savez(path, coefs=self.coefs)
+        else:
+            np.savez(path, coefs=self.coefs, freqs=self.freqs)
+
+    def rms_to_db(self, rms, freq=None, channel=None):
+        """Converts RMS levels to dB.
+
+        Parameters
+        ----------
+        rms: float or array of floats
+            Waveform RMS levels.
+        freq: float, array of floats, or None, optional
+            Frequency (in Hz) of each level; broadcast against `rms`. Needed if
+            the calibration has multiple frequencies.
+        channel: int or None, optional
+            Channel to convert for. If ``None``, all channels are returned.
+
+        Returns
+        -------
+        db: array of floats
+            The dB levels; the same shape as `rms` (and `freq`) if `channel` is
+            provided, otherwise with an extra final axis for channel.
+
+        """
+
+        (slope, intercept) = self._coefs_at(freq=freq, channel=channel)
+
+        rms = np.array(rms, dtype=float)
+
+        if channel is None:
+            rms = rms[..., np.newaxis]
+
+        return slope * np.log10(rms) + intercept
+
+    def db_to_rms(self, db, freq=None, channel=None):
+        """Converts dB levels to RMS.
+
+        Parameters
+        ----------
+        db: float or array of floats
+            Desired dB levels.
+        freq: float, array of floats, or None, optional
+            Frequency (in Hz) of each level; broadcast against `db`. Needed if
+            the calibration has multiple frequencies.
+        channel: int or None, optional
+            Channel to convert for. If ``None``, all channels are returned.
+
+        Returns
+        -------
+        rms: array of floats
+            The RMS levels; the same shape as `db` (and `freq`) if `channel` is
+            provided, otherwise with an extra final axis for channel.
+
+        """
+
+        (slope, intercept) = self._coefs_at(freq=freq, channel=channel)
+
+        db = np.array(db, dtype=float)
+
+        if channel is None:
+            db = db[..., np.newaxis]
+
+        return 10 ** ((db - intercept) / slope)
+
+    def _coefs_at(self, freq, channel):
+        """Slope and intercept at each frequency, with a final axis for channel
+        if `channel` is ``None``."""
+
+        coefs = self.coefs
+
+        if channel is not None:
+            coefs = coefs[:, [channel], :]
+
+        if self.freqs is None or len(self.freqs) == 1:
+            freq_coefs = coefs[0, ...]
+
+        else:
+            if freq is None:
+                raise ValueError("Need a `freq` for a multiple-frequency calibration")
+
+            log_freq = np.log2(np.array(freq, dtype=float))
+
+            log_freqs = np.log2(self.freqs)
+
+            freq_coefs = np.stack(
+                [
+                    np.stack(
+                        [
+                            np.interp(log_freq, log_freqs, coefs[:, i_channel, i_coef])
+                            for i_coef in range(2)
+                        ],
+                        axis=-1,
+                    )
+                    for i_channel in range(coefs.shape[1])
+                ],
+                axis=-2,
+            )
+
+        slope = freq_coefs[..., 0]
+        intercept = freq_coefs[..., 1]
+
+        if channel is not None:
+            (slope, intercept) = (slope[..., 0], intercept[..., 0])
+
+        return (slope, intercept)
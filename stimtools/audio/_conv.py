@@ -0,0 +1,348 @@
+import concurrent.futures
+import itertools
+import os
+
+import numpy as np
+
+import scipy.fft
+
+from ._dtype import working_dtype, from_float, to_float
+
+
+class PartitionedConvolver:
+    def __init__(self, ir, block_samples=1024, dtype="float64"):
+        """Streaming convolution with an impulse response, using uniformly
+        partitioned overlap-save.
+
+        The impulse response is split into partitions of `block_samples`, whose
+        spectra are computed once. Each input block is then convolved using one
+        forward and one inverse FFT of size ``2 * block_samples``, so that long
+        sources can be processed in bounded memory; the output for each block is
+        returned as soon as the block is processed.
+
+        Parameters
+        ----------
+        ir: array of floats or int16
+            Impulse response; 1D or (number of samples x channels).
+        block_samples: int, optional
+            Number of samples in each input (and output) block.
+        dtype: string or numpy dtype, {"float64", "float32", "int16"}, optional
+            Data type of the output. The convolution is done in float32 unless
+            this is "float64", and "int16" output is clipped and quantised to
+            the 16-bit range.
+
+        Notes
+        -----
+        * Input blocks can be 1D or (number of samples x channels); channels
+          are broadcast against those of the impulse response, and a 1D block
+          is treated as having a single channel.
+        * All blocks need to have `block_samples` samples, except for the final
+          block which can be shorter.
+
+        Examples
+        --------
+        >>> convolver = PartitionedConvolver(ir=ir, block_samples=2048)
+        >>> for out_block in convolver.stream(blocks=source_blocks):
+        ...     sound_card.play(out_block)
+
+        """
+
+        self._dtype = dtype
+
+        self._work_dtype = working_dtype(dtype)
+
+        # int16 waveforms are rescaled to [-1, +1]
+        ir = to_float(np.asarray(ir), dtype=self._work_dtype)
+
+        if ir.ndim == 1:
+            ir = ir[:, np.newaxis]
+
+        (self._n_ir, n_ir_channels) = ir.shape
+
+        self.block_samples = block_samples
+
+        self._n_partitions = int(np.ceil(self._n_ir / block_samples))
+
+        partitions = np.zeros(
+            (self._n_partitions * block_samples, n_ir_channels),
+            dtype=self._work_dtype,
+        )
+        partitions[: self._n_ir, :] = ir
+
+        partitions = partitions.reshape(
+            self._n_partitions, block_samples, n_ir_channels
+        )
+
+        # (partitions x frequencies x channels)
+        self._ir_spectra = np.fft.rfft(partitions, n=2 * block_samples, axis=1)
+
+        self.reset()
+
+    def reset(self):
+        """Clears the convolution state, ready for a new source."""
+
+        # the frequency-domain delay line, stored twice so that the most recent
+        # `n_partitions` spectra are always available as a contiguous view
+        self._fdl = None
+        self._i_slot = 0
+
+        self._input = None
+
+        self._tail = None
+
+    def process(self, block):
+        """Convolves the next block of the source.
+
+        Parameters
+        ----------
+        block: array of floats or int16
+            Source samples; 1D or (number of samples x channels).
+
+        Returns
+        -------
+        out_block: 2D array
+            Output samples (number of samples x channels), of the same length
+            as `block`.
+
+        """
+
+        return from_float(self._process(block), self._dtype)
+
+    def _process(self, block):
+        """Convolves the next block of the source, giving the output in the
+        working type (i.e., before any conversion to the output type)."""
+
+        if self._tail is not None:
+            raise ValueError("Only the final block can be shorter")
+
+        block = to_float(np.asarray(block), dtype=self._work_dtype)
+
+        if block.ndim == 1:
+            block = block[:, np.newaxis]
+
+        (n_block, n_block_channels) = block.shape
+
+        if n_block > self.block_samples:
+            raise ValueError("Block is longer than `block_samples`")
+
+        if self._input is None:
+
+            n_channels = np.broadcast_shapes(
+                (n_block_channels,), self._ir_spectra.shape[-1:]
+            )[0]
+
+            self._input = np.zeros(
+                (2 * self.block_samples, n_block_channels), dtype=self._work_dtype
+            )
+
+            self._fdl = np.zeros(
+                (2 * self._n_partitions,)
+                + self._ir_spectra.shape[1:-1]
+                + (n_channels,),
+                dtype=self._ir_spectra.dtype,
+            )
+
+        self._input[: self.block_samples, :] = self._input[self.block_samples :, :]
+        self._input[self.block_samples :, :] = 0.0
+        self._input[self.block_samples : (self.block_samples + n_block), :] = block
+
+        spectrum = np.fft.rfft(self._input, axis=0)
+
+        self._i_slot = (self._i_slot - 1) % self._n_partitions
+
+        for i_slot in (self._i_slot, self._i_slot + self._n_partitions):
+            self._fdl[i_slot, ...] = spectrum
+
+        fdl = self._fdl[self._i_slot : (self._i_slot + self._n_partitions), ...]
+
+        out_spectrum = np.einsum(
+            "pfc,pfc->fc", fdl, np.broadcast_to(self._ir_spectra, fdl.shape)
+        )
+
+        out = np.fft.irfft(out_spectrum, n=2 * self.block_samples, axis=0)[
+            self.block_samples :, :
+        ]
+
+        if n_block < self.block_samples:
+            # the zero padding has already produced the start of the tail
+            self._tail = out[n_block:, :]
+
+        return out[:n_block, :]
+
+    def flush(self):
+        """Returns the remaining output after the final block of the source,
+        and resets the convolution state.
+
+        Returns
+        -------
+        out_block: 2D array
+            The final (number of impulse response samples - 1) output samples.
+
+        """
+
+        n_tail = self._n_ir - 1
+
+        tails = []
+
+        if self._tail is not None:
+            tails.append(self._tail)
+            self._tail = None
+
+        zeros = np.zeros((self.block_samples, 1), dtype=self._work_dtype)
+
+        while sum(len(tail) for tail in tails) < n_tail:
+            tails.append(self._process(zeros))
+
+        if tails:
+            tail = np.concatenate(tails)[:n_tail, :]
+        else:
+            tail = np.zeros((0, self._ir_spectra.shape[-1]), dtype=self._work_dtype)
+
+        self.reset()
+
+        return from_float(tail, self._dtype)
+
+    def stream(self, blocks):
+        """Convolves a sequence of source blocks, yielding output blocks
+        (including the tail after the source has finished).
+
+        Parameters
+        ----------
+        blocks: iterable of arrays
+            Source blocks, such as from ``stimtools.audio.pink_noise_blocks``.
+
+        Returns
+        -------
+        out_blocks: generator of 2D arrays
+            The output blocks.
+
+        """
+
+        for block in blocks:
+            yield self.process(block)
+
+        yield self.flush()
+
+
+def convolve_batch(sources, irs, n_workers=None, dtype="float64", out=None):
+    """Convolves every source waveform with every impulse response.
+
+    Each source and each impulse response is transformed once, at an FFT size
+    shared by all of them, and each convolution is then a product of spectra
+    and one inverse FFT. The work is spread over a pool of threads.
+
+    Parameters
+    ----------
+    sources: sequence of arrays of floats or int16
+        Source waveforms; each is 1D or (number of samples x channels), and
+        they can differ in length.
+    irs: sequence of arrays of floats or int16
+        Impulse responses; each is 1D or (number of samples x channels), and
+        they can differ in length.
+    n_workers: int or None, optional
+        Number of threads. If ``None``, it is chosen by ``concurrent.futures``.
+    dtype: string or numpy dtype, {"float64", "float32", "int16"}, optional
+        Data type of the output. The convolution is done in float32 unless this
+        is "float64", and "int16" output is clipped and quantised to the 16-bit
+        range.
+    out: function or None, optional
+        If provided, each convolved waveform is passed to this function as
+        ``out(i_source, i_ir, waveform)`` (e.g., to save it) rather than being
+        kept in memory. It is called from the calling thread (so it doesn't
+        need to be thread-safe), in the order that the convolutions finish.
+
+    Returns
+    -------
+    bank: list of lists of arrays, or None
+        The convolved waveforms ("full" mode), indexed as ``bank[i_source][i_ir]``.
+        As for ``stimtools.audio.convolve``, a 1D waveform is repeated over two
+        channels if convolved with a 2D one. ``None`` if `out` is provided.
+
+    """
+
+    work_dtype = working_dtype(dtype)
+
+    # int16 waveforms are rescaled to [-1, +1]
+    sources = [to_float(np.asarray(source), dtype=work_dtype) for source in sources]
+    irs = [to_float(np.asarray(ir), dtype=work_dtype) for ir in irs]
+
+    n_fft = scipy.fft.next_fast_len(
+        max(len(source) for source in sources) + max(len(ir) for ir in irs) - 1,
+        real=True,
+    )
+
+    def transform(waveform):
+        if waveform.ndim == 1:
+            waveform = waveform[:, np.newaxis]
+        return scipy.fft.rfft(waveform, n=n_fft, axis=0)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=n_workers) as executor:
+
+        source_spectra = list(executor.map(transform, sources))
+        ir_spectra = list(executor.map(transform, irs))
+
+        def convolve_pair(i_source, i_ir):
+
+            (source, ir) = (sources[i_source], irs[i_ir])
+
+            y = scipy.fft.irfft(
+                source_spectra[i_source] * ir_spectra[i_ir], n=n_fft, axis=0
+            )[: (len(source) + len(ir) - 1), :]
+
+            # a 1D source and a 1D impulse response give a 1D output, whereas
+            # mixing 1D and 2D gives 2 channels
+            if source.ndim == 1 and ir.ndim == 1:
+                y = y[:, 0]
+            elif y.shape[1] == 1:
+                y = np.repeat(y, repeats=2, axis=-1)
+
+            return from_float(y, dtype)
+
+        pairs = list(itertools.product(range(len(sources)), range(len(irs))))
+
+        if out is None:
+            outputs = list(executor.map(lambda pair: convolve_pair(*pair), pairs))
+
+        else:
+            _convolve_to_out(
+                executor=executor,
+                convolve_pair=convolve_pair,
+                pairs=pairs,
+                out=out,
+                max_pending=2 * (n_workers or os.cpu_count() or 1),
+            )
+
+    if out is not None:
+        return None
+
+    bank = [
+        outputs[(i_source * len(irs)) : ((i_source + 1) * len(irs))]
+        for i_source in range(len(sources))
+    ]
+
+    return bank
+
+
+def _convolve_to_out(executor, convolve_pair, pairs, out, max_pending):
+    """Passes each convolved pair to `out` from the calling thread, as the
+    convolutions finish, with at most `max_pending` waveforms held at once."""
+
+    pending = {}
+
+    for (i_source, i_ir) in pairs:
+
+        future = executor.submit(convolve_pair, i_source, i_ir)
+        pending[future] = (i_source, i_ir)
+
+        if len(pending) < max_pending:
+            continue
+
+        (done, _) = concurrent.futures.wait(
+            pending, return_when=concurrent.futures.FIRST_COMPLETED
+        )
+
+        for future in done:
+            out(*pending.pop(future), future.result())
+
+    for future in concurrent.futures.as_completed(pending):
+        out(*pending[future], future.result())
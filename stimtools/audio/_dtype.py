@@ -0,0 +1,84 @@
+import numpy as np
+
+
+# scaling between [-1, +1] floats and 16-bit integers
+INT16_SCALE = 32767
+
+
+def working_dtype(dtype):
+    """The floating-point type in which a waveform with an output type of
+    `dtype` is generated.
+
+    Parameters
+    ----------
+    dtype: string or numpy dtype, {"float64", "float32", "int16"}
+        Output data type.
+
+    Returns
+    -------
+    work_dtype: numpy dtype
+        float64 for float64 output, and float32 otherwise.
+
+    """
+
+    dtype = np.dtype(dtype)
+
+    if dtype == np.float64:
+        return dtype
+
+    if dtype in (np.float32, np.int16):
+        return np.dtype(np.float32)
+
+    raise ValueError("Unknown `dtype`; needs to be float64, float32, or int16")
+
+
+def from_float(waveform, dtype):
+    """Converts a floating-point waveform to the output type `dtype`, without
+    copying if it is already of that type.
+
+    Parameters
+    ----------
+    waveform: array of floats
+        Waveform, nominally in the range [-1, +1].
+    dtype: string or numpy dtype, {"float64", "float32", "int16"}
+        Output data type. If "int16", the waveform is clipped to [-1, +1] and
+        quantised to the full 16-bit range.
+
+    Returns
+    -------
+    waveform: array
+        The waveform, as `dtype`.
+
+    """
+
+    dtype = np.dtype(dtype)
+
+    if dtype == np.int16:
+        waveform = np.clip(waveform, a_min=-1, a_max=1) * INT16_SCALE
+        return np.round(waveform, out=waveform).astype(np.int16)
+
+    return waveform.astype(dtype, copy=False)
+
+
+def to_float(waveform, dtype="float32"):
+    """Converts a waveform to the floating-point type `dtype`, rescaling from
+    the 16-bit range if it is an integer waveform.
+
+    Parameters
+    ----------
+    waveform: array
+        Waveform.
+    dtype: string or numpy dtype, optional
+        Floating-point output type.
+
+    Returns
+    -------
+    waveform: array of floats
+        The waveform, as `dtype`.
+
+    """
+
+    if waveform.dtype == np.int16:
+        return waveform.astype(dtype) / np.array(INT16_SCALE, dtype=dtype)
+
+    return waveform.astype(dtype, copy=False)
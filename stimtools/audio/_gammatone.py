@@ -0,0 +1,330 @@
+import numpy as np
+
+import scipy.fft
+
+from ._dtype import working_dtype, to_float
+
+
+# Glasberg & Moore ERB parameters
+EAR_Q = 9.26449
+MIN_BW = 24.7
+
+# number of samples that all the filters are applied to at once
+BLOCK_SAMPLES = 2048
+
+
+def erbspace(low, high, n, ear_q=EAR_Q, min_bw=MIN_BW):
+    """Centre frequencies that are equally spaced on an ERB scale.
+
+    Parameters
+    ----------
+    low, high: numbers
+        Lowest and highest frequencies, in Hz.
+    n: int
+        Number of frequencies.
+    ear_q, min_bw: numbers, optional
+        ERB parameters.
+
+    Returns
+    -------
+    cf: 1D array of floats
+        The frequencies, in Hz, in ascending order from `low` to `high`.
+
+    """
+
+    offset = ear_q * min_bw
+
+    cf = -offset + np.exp(
+        np.arange(n) * (np.log(low + offset) - np.log(high + offset)) / (n - 1)
+    ) * (high + offset)
+
+    return cf[::-1]
+
+
+class GammatoneFilterbank:
+    def __init__(self, cf, sr, dtype="float64", b=1.019, ear_q=EAR_Q, min_bw=MIN_BW):
+        """A bank of gammatone filters, each implemented as a cascade of four
+        second-order IIR sections (Slaney, 1993, "An efficient implementation of
+        the Patterson-Holdsworth auditory filter bank", Apple Computer
+        Technical Report #35).
+
+        This is the same design as ``brian2hears.Gammatone``; each filter has
+        unity gain at its centre frequency.
+
+        All the filters are applied together, in blocks of ``BLOCK_SAMPLES``:
+        each cascade is expressed in state-space form, so that the output over
+        a block is the convolution of the block with the filter's impulse
+        response (computed with a single FFT for all the filters) plus the
+        response to the state at the start of the block.
+
+        Parameters
+        ----------
+        cf: sequence of numbers
+            Centre frequency of each filter, in Hz (e.g., from ``erbspace``).
+        sr: int
+            Sample rate, in Hz.
+        dtype: string or numpy dtype, {"float64", "float32", "int16"}, optional
+            Determines the data type that the filtering is done in, and of the
+            output: float64 if "float64", and float32 otherwise (i.e., int16 is
+            accepted, and gives float32 output).
+        b, ear_q, min_bw: numbers, optional
+            Bandwidth parameters.
+
+        Notes
+        -----
+        * The filter state is kept between calls to ``process``, so a long
+          input can be filtered in blocks (or as a stream); call ``reset``
+          before filtering a new input.
+
+        Examples
+        --------
+        >>> bank = GammatoneFilterbank(cf=erbspace(low=20, high=16000, n=33), sr=sr)
+        >>> output = bank.process(waveform)
+
+        """
+
+        self.cf = np.atleast_1d(np.asarray(cf, dtype=float))
+        self.sr = sr
+
+        self._dtype = working_dtype(dtype)
+
+        sos = _gammatone_sos(cf=self.cf, sr=sr, b=b, ear_q=ear_q, min_bw=min_bw)
+
+        self.sos = sos.astype(self._dtype)
+
+        # the operators are computed in float64, and then converted
+        (a, impulse, state_out, input_state) = _block_operators(
+            sos=sos, n_samples=BLOCK_SAMPLES
+        )
+
+        self._a = a
+        self._a_block = np.linalg.matrix_power(a, BLOCK_SAMPLES).astype(self._dtype)
+
+        self._impulse_spectra = scipy.fft.rfft(
+            impulse.astype(self._dtype), n=2 * BLOCK_SAMPLES, axis=-1
+        )
+
+        self._state_out = state_out.astype(self._dtype)
+        self._input_state = input_state.astype(self._dtype)
+
+        self.reset()
+
+    @property
+    def n_channels(self):
+        return len(self.cf)
+
+    def reset(self):
+        """Clears the filter state, ready for a new input."""
+
+        # the state of each section, as in ``scipy.signal.sosfilt``; (filters x
+        # sections x 2)
+        (n_filters, n_sections, _) = self.sos.shape
+
+        self._zi = np.zeros((n_filters, n_sections, 2), dtype=self._dtype)
+
+    def process(self, block):
+        """Filters the next block of the input.
+
+        Parameters
+        ----------
+        block: 1D array of floats or int16
+            Input samples; int16 samples are rescaled to [-1, +1].
+
+        Returns
+        -------
+        output: 2D array of floats
+            Output of each filter (number of samples x filters).
+
+        """
+
+        block = to_float(np.asarray(block), dtype=self._dtype)
+
+        if block.ndim != 1:
+            raise ValueError("Input needs to be 1D")
+
+        output = np.empty((len(block), self.n_channels), dtype=self._dtype)
+
+        # (filters x states)
+        state = self._zi.reshape(self.n_channels, -1)
+
+        for i_start in range(0, len(block), BLOCK_SAMPLES):
+
+            x = block[i_start : (i_start + BLOCK_SAMPLES)]
+
+            n_x = len(x)
+
+            # response of every filter to the input, from a zero state
+            y = scipy.fft.irfft(
+                self._impulse_spectra * scipy.fft.rfft(x, n=2 * BLOCK_SAMPLES),
+                n=2 * BLOCK_SAMPLES,
+                axis=-1,
+                workers=-1,
+            )[:, :n_x]
+
+            # plus the response to the state at the start of the block
+            y += np.matmul(self._state_out[:, :n_x, :], state[:, :, np.newaxis])[..., 0]
+
+            output[i_start : (i_start + n_x), :] = y.T
+
+            if n_x == BLOCK_SAMPLES:
+                a_block = self._a_block
+            else:
+                a_block = np.linalg.matrix_power(self._a, n_x).astype(self._dtype)
+
+            state = (
+                np.matmul(a_block, state[:, :, np.newaxis])[..., 0]
+                + self._input_state[:, :, (BLOCK_SAMPLES - n_x) :] @ x
+            )
+
+        self._zi = state.reshape(self._zi.shape)
+
+        return output
+
+
+def _block_operators(sos, n_samples):
+    """State-space form of each cascade of second-order sections, and the
+    operators that apply it to a block of `n_samples` samples.
+
+    Returns
+    -------
+    a: (filters x states x states) array
+        State transition matrix; the state is that of ``scipy.signal.sosfilt``
+        (the two delays of each transposed direct form II section).
+    impulse: (filters x samples) array
+        Impulse response from a zero state.
+    state_out: (filters x samples x states) array
+        Output at each sample in response to the state at the start of the
+        block.
+    input_state: (filters x states x samples) array
+        Contribution of each input sample to the state at the end of the
+        block.
+
+    """
+
+    (n_filters, n_sections, _) = sos.shape
+
+    # each section: y = z_1 + b_0 x; z_1' = z_2 + b_1 x - a_1 y; z_2' = b_2 x - a_2 y
+    (b_0, b_1, b_2, _, a_1, a_2) = np.moveaxis(sos, -1, 0)
+
+    n_states = 2 * n_sections
+
+    a = np.zeros((n_filters, n_states, n_states))
+    b = np.zeros((n_filters, n_states))
+    c = np.zeros((n_filters, n_states))
+    d = np.ones(n_filters)
+
+    for i_section in range(n_sections):
+
+        i_state = 2 * i_section
+
+        # gain from the input of this section to each of its delays
+        in_gain_1 = b_1[:, i_section] - a_1[:, i_section] * b_0[:, i_section]
+        in_gain_2 = b_2[:, i_section] - a_2[:, i_section] * b_0[:, i_section]
+
+        # the input to this section is the output of the previous sections
+        a[:, i_state, :i_state] = in_gain_1[:, np.newaxis] * c[:, :i_state]
+        a[:, i_state + 1, :i_state] = in_gain_2[:, np.newaxis] * c[:, :i_state]
+
+        a[:, i_state, i_state] = -a_1[:, i_section]
+        a[:, i_state, i_state + 1] = 1.0
+        a[:, i_state + 1, i_state] = -a_2[:, i_section]
+
+        b[:, i_state] = in_gain_1 * d
+        b[:, i_state + 1] = in_gain_2 * d
+
+        # the output of this section
+        c[:, :i_state] *= b_0[:, i_section, np.newaxis]
+        c[:, i_state] = 1.0
+        d = d * b_0[:, i_section]
+
+    impulse = np.empty((n_filters, n_samples))
+    state_out = np.empty((n_filters, n_samples, n_states))
+    input_state = np.empty((n_filters, n_states, n_samples))
+
+    impulse[:, 0] = d
+
+    # powers of the transition matrix, applied progressively
+    c_power = c
+    b_power = b
+
+    for i_sample in range(n_samples):
+
+        # C A^n
+        state_out[:, i_sample, :] = c_power
+        # A^n B
+        input_state[:, :, n_samples - 1 - i_sample] = b_power
+
+        if i_sample + 1 < n_samples:
+            impulse[:, i_sample + 1] = np.einsum("fs,fs->f", c, b_power)
+
+        c_power = np.einsum("fs,fst->ft", c_power, a)
+        b_power = np.einsum("fst,ft->fs", a, b_power)
+
+    return (a, impulse, state_out, input_state)
+
+
+def _gammatone_sos(cf, sr, b, ear_q, min_bw):
+    """Second-order sections (filters x 4 x 6) of a gammatone filterbank."""
+
+    t = 1.0 / sr
+
+    erb = cf / ear_q + min_bw
+
+    bw = b * 2 * np.pi * erb
+
+    arg = 2 * cf * np.pi * t
+
+    decay = np.exp(bw * t)
+
+    # the numerator of each section has the form (T, a_1, 0), where a_1 differs
+    # across the sections
+    (sqrt_plus, sqrt_minus) = (np.sqrt(3 + 2**1.5), np.sqrt(3 - 2**1.5))
+
+    a_1 = np.stack(
+        [
+            -(2 * t * np.cos(arg) / decay + sign * 2 * root * t * np.sin(arg) / decay)
+            / 2
+            for (root, sign) in (
+                (sqrt_plus, +1),
+                (sqrt_plus, -1),
+                (sqrt_minus, +1),
+                (sqrt_minus, -1),
+            )
+        ],
+        axis=1,
+    )
+
+    # gain at the centre frequency, so that it can be normalised to one
+    centre = np.exp(4j * cf * np.pi * t)
+    pole_term = 2 * np.exp(-(bw * t) + 2j * cf * np.pi * t) * t
+
+    gain = np.abs(
+        np.prod(
+            [
+                -2 * centre * t + pole_term * (np.cos(arg) + sign * root * np.sin(arg))
+                for (root, sign) in (
+                    (sqrt_minus, -1),
+                    (sqrt_minus, +1),
+                    (sqrt_plus, -1),
+                    (sqrt_plus, +1),
+                )
+            ],
+            axis=0,
+        )
+        / (-2 / np.exp(2 * bw * t) - 2 * centre + 2 * (1 + centre) / decay) ** 4
+    )
+
+    n_filters = len(cf)
+
+    sos = np.zeros((n_filters, 4, 6))
+
+    sos[:, :, 0] = t
+    sos[:, :, 1] = a_1
+    sos[:, :, 3] = 1.0
+    sos[:, :, 4] = (-2 * np.cos(arg) / decay)[:, np.newaxis]
+    sos[:, :, 5] = np.exp(-2 * bw * t)[:, np.newaxis]
+
+    # the gain is applied to the first section
+    sos[:, 0, :3] /= gain[:, np.newaxis]
+
+    return sos
@@ -1,6 +1,24 @@
+import os
+import struct
+
+import numpy as np
+
 import soundfile
 
 
+# numpy types of the uncompressed WAV encodings that can be memory-mapped, by
+# (format tag, bits per sample)
+MMAP_DTYPES = {
+    (1, 8): np.dtype("u1"),
+    (1, 16): np.dtype("<i2"),
+    (1, 32): np.dtype("<i4"),
+    (3, 32): np.dtype("<f4"),
+    (3, 64): np.dtype("<f8"),
+}
+
+WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
 def save(wav_path, waveform, sr, wav_format="WAV", wav_type="PCM_16"):
 
     soundfile.write(
@@ -8,11 +26,196 @@ def save(wav_path, waveform, sr, wav_format="WAV", wav_type="PCM_16"):
     )
 
 
-def load(wav_path, with_sr=False, *_, **kwargs):
+def load(wav_path, with_sr=False, *_, mmap=False, **kwargs):
+    """Loads a waveform from an audio file.
+
+    Parameters
+    ----------
+    wav_path: string
+        Path to the audio file.
+    with_sr: bool, optional
+        Whether to also return the sample rate.
+    mmap: bool, optional
+        If ``True``, the file is not read; instead, a read-only memory-mapped
+        view of its samples is returned. Only possible for uncompressed 8, 16,
+        or 32-bit PCM, or 32 or 64-bit float, WAV files. Note that the samples
+        are not rescaled to floats, and the view is always (number of samples
+        x channels).
+    kwargs: keyword arguments
+        Passed to ``soundfile.read``; for example, `start` and `stop` (or
+        `frames`) read a range of samples, and `dtype` sets the output type.
+        Only `start` and `stop` are used if `mmap` is ``True``.
+
+    Returns
+    -------
+    wav: array
+        Waveform.
+    sr: int
+        Sample rate; only returned if `with_sr` is ``True``.
 
-    (wav, sr) = soundfile.read(file=wav_path, **kwargs)
+    """
+
+    if mmap:
+        (wav, sr) = _load_mmap(wav_path=wav_path)
+        wav = wav[kwargs.get("start", 0) : kwargs.get("stop"), :]
+    else:
+        (wav, sr) = soundfile.read(file=wav_path, **kwargs)
 
     if with_sr:
         return (wav, sr)
     else:
         return wav
+
+
+def load_blocks(wav_path, block_samples=4096, start=0, stop=None, **kwargs):
+    """Reads a waveform from an audio file as a sequence of fixed-size blocks,
+    so that long recordings can be processed in constant memory.
+
+    Parameters
+    ----------
+    wav_path: string
+        Path to the audio file.
+    block_samples: int, optional
+        Number of samples in each block. The final block may be shorter.
+    start, stop: int or None, optional
+        Range of samples to read.
+    kwargs: keyword arguments
+        Passed to ``soundfile.blocks``; for example, `dtype` and `always_2d`.
+
+    Yields
+    ------
+    block: array
+        The next block of the waveform.
+
+    """
+
+    yield from soundfile.blocks(
+        wav_path, blocksize=block_samples, start=start, stop=stop, **kwargs
+    )
+
+
+class WavWriter:
+    def __init__(self, wav_path, sr, n_channels, wav_format="WAV", wav_type="PCM_16"):
+        """Writes a waveform to an audio file incrementally, so that it never
+        needs to be held in memory in its entirety.
+
+        Parameters
+        ----------
+        wav_path: string
+            Path to the audio file; overwritten if it exists.
+        sr: int
+            Sample rate.
+        n_channels: int
+            Number of channels.
+        wav_format, wav_type: strings, optional
+            See ``save``.
+
+        Notes
+        -----
+        * Blocks can be 1D (if `n_channels` is 1) or (number of samples x
+          channels), and can be float or int16 (as produced with ``dtype``
+          arguments of the generators).
+        * The file is only complete once ``close`` is called, which happens on
+          exiting if used as a context manager.
+
+        Examples
+        --------
+        >>> with WavWriter(wav_path="noise.wav", sr=44100, n_channels=2) as writer:
+        ...     for block in white_noise_blocks(dur_s=600.0, rms=0.05):
+        ...         writer.write(block)
+
+        """
+
+        self._sound_file = soundfile.SoundFile(
+            wav_path,
+            mode="w",
+            samplerate=sr,
+            channels=n_channels,
+            format=wav_format,
+            subtype=wav_type,
+        )
+
+        self.n_samples = 0
+
+    def write(self, block):
+        """Appends a block of samples to the file."""
+
+        self._sound_file.write(block)
+
+        self.n_samples += len(block)
+
+    def close(self):
+        """Finalises and closes the file."""
+        self._sound_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+
+def _load_mmap(wav_path):
+    """Memory-mapped view of the samples in an uncompressed WAV file."""
+
+    with open(wav_path, "rb") as wav_file:
+
+        (riff_id, _, wave_id) = struct.unpack("<4sI4s", wav_file.read(12))
+
+        if riff_id != b"RIFF" or wave_id != b"WAVE":
+            raise ValueError("Only RIFF WAV files can be memory-mapped")
+
+        fmt = None
+
+        while True:
+
+            chunk_header = wav_file.read(8)
+
+            if len(chunk_header) < 8:
+                raise ValueError("No data chunk found")
+
+            (chunk_id, chunk_size) = struct.unpack("<4sI", chunk_header)
+
+            if chunk_id == b"fmt ":
+                fmt = wav_file.read(chunk_size)
+            elif chunk_id == b"data":
+                data_offset = wav_file.tell()
+                break
+            else:
+                wav_file.seek(chunk_size, 1)
+
+            # chunks are word-aligned
+            if chunk_size % 2:
+                wav_file.seek(1, 1)
+
+    if fmt is None:
+        raise ValueError("No format chunk found")
+
+    (format_tag, n_channels, sr, _, _, bits) = struct.unpack("<HHIIHH", fmt[:16])
+
+    # the actual format tag is at the start of the sub-format GUID
+    if format_tag == WAVE_FORMAT_EXTENSIBLE:
+        (format_tag,) = struct.unpack("<H", fmt[24:26])
+
+    try:
+        dtype = MMAP_DTYPES[(format_tag, bits)]
+    except KeyError:
+        raise ValueError(
+            f"Cannot memory-map WAV files with format {format_tag:d} and "
+            + f"{bits:d} bits per sample"
+        )
+
+    # the data size can be wrong if the writer didn't finalise the file
+    data_size = min(chunk_size, os.path.getsize(wav_path) - data_offset)
+
+    n_samples = data_size // (dtype.itemsize * n_channels)
+
+    wav = np.memmap(
+        wav_path,
+        dtype=dtype,
+        mode="r",
+        offset=data_offset,
+        shape=(n_samples, n_channels),
+    )
+
+    return (wav, sr)
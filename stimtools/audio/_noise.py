@@ -1,14 +1,19 @@
 from __future__ import absolute_import, print_function, division
 
-import collections
+import functools
 import warnings
 
 import numpy as np
 
+import scipy.fft
+import scipy.signal
+
 import soundfile
 
 import stimtools.utils
 
+from ._dtype import working_dtype, from_float
+
 
 def white_noise(
     dur_s,
@@ -20,6 +25,10 @@ def white_noise(
     post_pad_samples=0,
     out_of_range="error",
     rand=None,
+    dtype="float64",
+    seed=None,
+    n_channels=2,
+    channel_corr=None,
 ):
     """Generates a 'white noise' waveform (Gaussian noise).
 
@@ -27,10 +36,11 @@ def white_noise(
     ----------
     dur_s: float
         Duration, in seconds.
-    rms: float or two-item sequences of floats
-        Root-mean-square amplitude for the L and R channels.
+    rms: float or sequence of floats
+        Root-mean-square amplitude for each channel.
     same_lr: bool, optional
-        Whether the left and right channels have the same random samples.
+        Whether the channels have the same random samples. Ignored if
+        `channel_corr` is provided.
     filename: string or None, optional
         If provided, saves the waveform as a 'wav' file.
     rate: int, optional
@@ -44,29 +54,43 @@ def white_noise(
         What to do if the waveform goes out of range.
     rand: np.random.RandomState instance or None, optional
         Random number generator.
+    dtype: string or numpy dtype, {"float64", "float32", "int16"}, optional
+        Data type of the waveform. It is generated as float32 unless this is
+        "float64", and "int16" waveforms are quantised to the 16-bit range.
+    seed: int or None, optional
+        Seed for the random number generator, if `rand` is not provided.
+    n_channels: int, optional
+        Number of channels.
+    channel_corr: float, 2D array of floats, or None, optional
+        Correlation between the channels; either a single value for all pairs
+        of channels or a (number of channels x number of channels) correlation
+        matrix. If ``None``, it is 1 if `same_lr` is ``True`` and 0 otherwise.
 
     Returns
     -------
     y : numpy array of 16-bit integers
-        A 2D array (number of samples x 2).
+        A 2D array (number of samples x number of channels).
 
     """
 
     if rand is None:
-        rand = np.random.RandomState()
+        rand = np.random.RandomState(seed=seed)
+
+    rms = _channel_levels(rms=rms, n_channels=n_channels)
 
-    if not isinstance(rms, collections.Sequence):
-        rms = [rms] * 2
+    if channel_corr is None:
+        channel_corr = 1.0 if same_lr else 0.0
 
-    rms = np.array(rms)
+    mixing = _channel_mixing(channel_corr=channel_corr, n_channels=n_channels)
+
+    (n_sources, _) = mixing.shape
 
     n_samples = int(dur_s * rate)
 
-    if same_lr:
-        y = rand.normal(loc=0.0, scale=1.0, size=(n_samples, 1))
-        y = np.tile(y, (1, 2))
-    else:
-        y = rand.normal(loc=[0.0] * 2, scale=[1.0] * 2, size=(n_samples, 2))
+    work_dtype = working_dtype(dtype)
+
+    y = rand.normal(loc=0.0, scale=1.0, size=(n_samples, n_sources))
+    y = _mix_channels(y.astype(work_dtype, copy=False), mixing=mixing)
 
     if window_samples > 0:
         y = stimtools.utils.apply_hanning(y, window_samples)
@@ -87,7 +111,9 @@ def white_noise(
 
     y = np.clip(y, a_min=-1, a_max=1)
 
-    y = np.concatenate((y, np.zeros((post_pad_samples, 2))))
+    y = np.concatenate((y, np.zeros((post_pad_samples, n_channels), dtype=work_dtype)))
+
+    y = from_float(y, dtype)
 
     if filename is not None:
 
@@ -107,6 +133,9 @@ def pink_noise(
     post_pad_samples=10000,
     out_of_range=None,
     seed=None,
+    dtype="float64",
+    n_channels=2,
+    channel_corr=1.0,
 ):
     """Generates a 'pink noise' (1/f) waveform, within the range for 20Hz to
     20kHz.
@@ -115,8 +144,8 @@ def pink_noise(
     ----------
     dur_s : float
         Duration, in seconds.
-    rms : float or two-item sequences of floats
-        Root-mean-square amplitude for the L and R channels.
+    rms : float or sequence of floats
+        Root-mean-square amplitude for each channel.
     filename : string or None, optional
         If provided, saves the waveform as a 'wav' file.
     rate : int, optional
@@ -130,50 +159,144 @@ def pink_noise(
         What to do if the waveform goes out of range.
     seed : int or None, optional
         Seed for the random number generator.
+    dtype : string or numpy dtype, {"float64", "float32", "int16"}, optional
+        Data type of the waveform. It is generated as float32 unless this is
+        "float64", and "int16" waveforms are quantised to the 16-bit range.
+    n_channels : int, optional
+        Number of channels.
+    channel_corr : float or 2D array of floats, optional
+        Correlation between the channels; either a single value for all pairs
+        of channels or a (number of channels x number of channels) correlation
+        matrix. Channels are mixed from independent pink noise waveforms, so
+        the realised correlation only equals this value on average (except when
+        it is 1, where the channels are identical).
 
     Returns
     -------
     y : numpy array of 16-bit integers
-        A 2D array (number of samples x 2).
+        A 2D array (number of samples x number of channels).
 
     """
 
-    if not isinstance(rms, collections.Sequence):
-        rms = [rms] * 2
+    (y,) = pink_noise_tokens(
+        n_tokens=1,
+        dur_s=dur_s,
+        rms=rms,
+        rate=rate,
+        window_samples=window_samples,
+        post_pad_samples=post_pad_samples,
+        out_of_range=out_of_range,
+        seeds=[seed],
+        dtype=dtype,
+        n_channels=n_channels,
+        channel_corr=channel_corr,
+    )
 
-    rms = np.array(rms)
+    if filename is not None:
 
-    n_samples = int(dur_s * rate)
+        soundfile.write(
+            file=filename, data=y, samplerate=rate, format="wav", subtype="PCM_16"
+        )
 
-    freqs = np.fft.fftfreq(n_samples) * rate
+    return y
 
-    with np.errstate(divide="ignore"):
-        amps = 1.0 / np.abs(freqs)
 
-    amps[np.isinf(amps)] = 0.0
+def pink_noise_tokens(
+    n_tokens,
+    dur_s,
+    rms,
+    rate=44100,
+    window_samples=220,
+    post_pad_samples=10000,
+    out_of_range=None,
+    seeds=None,
+    dtype="float64",
+    n_channels=2,
+    channel_corr=1.0,
+):
+    """Generates a batch of independent 'pink noise' (1/f) waveforms, within
+    the range for 20Hz to 20kHz.
 
-    i_audible = np.logical_and(freqs >= 20, freqs <= 20000)
+    Parameters
+    ----------
+    n_tokens : int
+        Number of waveforms to generate.
+    dur_s : float
+        Duration, in seconds.
+    rms : float or sequence of floats
+        Root-mean-square amplitude for each channel.
+    rate : int, optional
+        Sample rate.
+    window_samples : int, optional
+        Number of samples to use in a Hanning window at the start and end of
+        each waveform.
+    post_pad_samples : int, optional
+        The number of zeros to append to each waveform.
+    out_of_range : string, {"warn", "err"}, or None, optional
+        What to do if a waveform goes out of range.
+    seeds : sequence of ints (or Nones), or None, optional
+        Seed for the random number generator of each waveform. A waveform is
+        identical to that produced by ``pink_noise`` with the same seed.
+    dtype : string or numpy dtype, {"float64", "float32", "int16"}, optional
+        Data type of the waveform. It is generated as float32 unless this is
+        "float64", and "int16" waveforms are quantised to the 16-bit range.
+    n_channels : int, optional
+        Number of channels.
+    channel_corr : float or 2D array of floats, optional
+        Correlation between the channels; either a single value for all pairs
+        of channels or a (number of channels x number of channels) correlation
+        matrix. Channels are mixed from independent pink noise waveforms, so
+        the realised correlation only equals this value on average (except when
+        it is 1, where the channels are identical).
 
-    amps[np.logical_not(i_audible)] = 0.0
+    Returns
+    -------
+    y : numpy array of floats
+        A 3D array (number of tokens x number of samples x number of channels).
 
-    rand = np.random.RandomState(seed=seed)
+    """
+
+    if seeds is None:
+        seeds = [None] * n_tokens
+
+    if len(seeds) != n_tokens:
+        raise ValueError("Need one seed per token")
+
+    rms = _channel_levels(rms=rms, n_channels=n_channels)
+
+    mixing = _channel_mixing(channel_corr=channel_corr, n_channels=n_channels)
+
+    # number of independent waveforms that are mixed to form the channels
+    (n_sources, _) = mixing.shape
+
+    n_samples = int(dur_s * rate)
+
+    work_dtype = working_dtype(dtype)
+
+    amps = _pink_amps(n_samples=n_samples, rate=rate).astype(work_dtype)
 
-    uniform = rand.uniform(-1, 1, n_samples)
+    uniform = np.empty((n_tokens, n_sources, n_samples), dtype=work_dtype)
 
-    phases = np.angle(np.fft.fft(uniform))
+    for (i_token, seed) in enumerate(seeds):
+        rand = np.random.RandomState(seed=seed)
+        uniform[i_token, :, :] = rand.uniform(-1, 1, (n_sources, n_samples))
+
+    phases = np.angle(np.fft.rfft(uniform, axis=-1))
 
     freq_domain = amps * np.cos(phases) + 1j * amps * np.sin(phases)
 
-    y = np.real(np.fft.ifft(freq_domain))
+    tokens = np.fft.irfft(freq_domain, n=n_samples, axis=-1)
 
     if window_samples > 0:
-        y = stimtools.utils.apply_hanning(y, window_samples)
+        stimtools.utils.apply_hanning(tokens, window_samples, axis=-1)
 
-    y = (y - np.mean(y)) / np.std(y)
+    tokens = (tokens - np.mean(tokens, axis=-1, keepdims=True)) / np.std(
+        tokens, axis=-1, keepdims=True
+    )
 
-    # convert to stereo
-    y = np.tile(y[:, np.newaxis], (1, 2))
+    y = np.zeros((n_tokens, n_samples + post_pad_samples, n_channels), dtype=work_dtype)
 
+    y[:, :n_samples, :] = _mix_channels(np.swapaxes(tokens, 1, 2), mixing=mixing)
     y *= rms
 
     if out_of_range in ("warn", "error"):
@@ -187,9 +310,334 @@ def pink_noise(
             else:
                 raise ValueError("Clipping would be required")
 
-    y = np.clip(y, a_min=-1, a_max=1)
+    y = np.clip(y, a_min=-1, a_max=1, out=y)
+
+    return from_float(y, dtype)
+
+
+@functools.lru_cache(maxsize=32)
+def _pink_amps(n_samples, rate):
+    """Amplitude spectrum of 1/f noise within 20Hz to 20kHz, over the
+    non-negative frequencies of a real FFT."""
+
+    freqs = np.fft.rfftfreq(n_samples) * rate
+
+    with np.errstate(divide="ignore"):
+        amps = 1.0 / np.abs(freqs)
+
+    amps[np.isinf(amps)] = 0.0
+
+    i_audible = np.logical_and(freqs >= 20, freqs <= 20000)
+
+    # the Nyquist frequency is counted as negative by a full FFT
+    if n_samples % 2 == 0:
+        i_audible[-1] = False
+
+    amps[np.logical_not(i_audible)] = 0.0
+
+    amps.flags.writeable = False
+
+    return amps
+
+
+def white_noise_blocks(
+    dur_s,
+    rms,
+    block_samples=4096,
+    same_lr=True,
+    rate=44100,
+    window_samples=220,
+    post_pad_samples=0,
+    out_of_range="error",
+    rand=None,
+    dtype="float64",
+    n_channels=2,
+    channel_corr=None,
+):
+    """Generates a 'white noise' waveform (Gaussian noise) as a sequence of
+    fixed-size blocks, so that long waveforms can be streamed in constant memory.
+
+    Parameters
+    ----------
+    dur_s: float or None
+        Duration, in seconds. If ``None``, blocks are generated indefinitely
+        (and there is no offset window or padding).
+    rms: float or sequence of floats
+        Root-mean-square amplitude for each channel.
+    block_samples: int, optional
+        Number of samples in each block. The final block may be shorter.
+    same_lr: bool, optional
+        Whether the channels have the same random samples. Ignored if
+        `channel_corr` is provided.
+    rate: int, optional
+        Sample rate.
+    window_samples: int, optional
+        Number of samples to use in a Hanning window at the start and end of
+        the waveform.
+    post_pad_samples: int, optional
+        The number of zeros to append to the waveform.
+    out_of_range: string, {"warn", "error"}, or None, optional
+        What to do if a block goes out of range.
+    rand: np.random.RandomState instance or None, optional
+        Random number generator.
+    dtype: string or numpy dtype, {"float64", "float32", "int16"}, optional
+        Data type of the waveform. It is generated as float32 unless this is
+        "float64", and "int16" waveforms are quantised to the 16-bit range.
+    n_channels: int, optional
+        Number of channels.
+    channel_corr: float, 2D array of floats, or None, optional
+        Correlation between the channels; either a single value for all pairs
+        of channels or a (number of channels x number of channels) correlation
+        matrix. If ``None``, it is 1 if `same_lr` is ``True`` and 0 otherwise.
+
+    Returns
+    -------
+    blocks : generator of numpy arrays
+        Each block is a 2D array (number of samples x number of channels).
+
+    """
+
+    if rand is None:
+        rand = np.random.RandomState()
+
+    if channel_corr is None:
+        channel_corr = 1.0 if same_lr else 0.0
+
+    mixing = _channel_mixing(channel_corr=channel_corr, n_channels=n_channels)
+
+    (n_sources, _) = mixing.shape
+
+    def draw(n):
+        y = rand.normal(loc=0.0, scale=1.0, size=(n, n_sources))
+        return _mix_channels(y, mixing=mixing)
+
+    return _iter_blocks(
+        draw=draw,
+        n_samples=None if dur_s is None else int(dur_s * rate),
+        block_samples=block_samples,
+        rms=_channel_levels(rms=rms, n_channels=n_channels),
+        window_samples=window_samples,
+        post_pad_samples=post_pad_samples,
+        out_of_range=out_of_range,
+        dtype=dtype,
+    )
+
+
+def pink_noise_blocks(
+    dur_s,
+    rms,
+    block_samples=4096,
+    rate=44100,
+    window_samples=220,
+    post_pad_samples=10000,
+    out_of_range=None,
+    seed=None,
+    dtype="float64",
+    n_channels=2,
+    channel_corr=1.0,
+):
+    """Generates a 'pink noise' (1/f) waveform, within the range for 20Hz to
+    20kHz, as a sequence of fixed-size blocks.
+
+    Parameters
+    ----------
+    dur_s : float or None
+        Duration, in seconds. If ``None``, blocks are generated indefinitely
+        (and there is no offset window or padding).
+    rms : float or sequence of floats
+        Root-mean-square amplitude for each channel.
+    block_samples: int, optional
+        Number of samples in each block. The final block may be shorter.
+    rate : int, optional
+        Sample rate.
+    window_samples : int, optional
+        Number of samples to use in a Hanning window at the start and end of
+        the waveform.
+    post_pad_samples : int, optional
+        The number of zeros to append to the waveform.
+    out_of_range : string, {"warn", "err"}, or None, optional
+        What to do if a block goes out of range.
+    seed : int or None, optional
+        Seed for the random number generator.
+    dtype : string or numpy dtype, {"float64", "float32", "int16"}, optional
+        Data type of the waveform. It is generated as float32 unless this is
+        "float64", and "int16" waveforms are quantised to the 16-bit range.
+    n_channels : int, optional
+        Number of channels.
+    channel_corr : float or 2D array of floats, optional
+        Correlation between the channels; either a single value for all pairs
+        of channels or a (number of channels x number of channels) correlation
+        matrix. Channels are mixed from independent pink noise waveforms, so
+        the realised correlation only equals this value on average (except when
+        it is 1, where the channels are identical).
+
+    Returns
+    -------
+    blocks : generator of numpy arrays
+        Each block is a 2D array (number of samples x number of channels).
+
+    Notes
+    -----
+    * Unlike ``pink_noise``, which shapes the spectrum of the whole waveform at
+      once, the spectral shaping here is done by a recursive (IIR) pinking
+      filter that carries its state across blocks. The 1/f slope is therefore an
+      approximation, and the RMS is set from the expected (rather than the
+      realised) output level.
+
+    """
+
+    rand = np.random.RandomState(seed=seed)
+
+    (sos, gain) = _pink_sos(rate=rate)
+
+    mixing = _channel_mixing(channel_corr=channel_corr, n_channels=n_channels)
+
+    (n_sources, _) = mixing.shape
+
+    # run the filter for a little while, so that the start of the waveform
+    # doesn't contain its onset transient
+    (_, zi) = scipy.signal.sosfilt(
+        sos=sos,
+        x=rand.normal(size=(int(rate * 0.25), n_sources)),
+        axis=0,
+        zi=np.zeros((sos.shape[0], 2, n_sources)),
+    )
+
+    def draw(n):
+
+        nonlocal zi
+
+        (y, zi) = scipy.signal.sosfilt(
+            sos=sos, x=rand.normal(size=(n, n_sources)), axis=0, zi=zi
+        )
+
+        y /= gain
+
+        return _mix_channels(y, mixing=mixing)
+
+    return _iter_blocks(
+        draw=draw,
+        n_samples=None if dur_s is None else int(dur_s * rate),
+        block_samples=block_samples,
+        rms=_channel_levels(rms=rms, n_channels=n_channels),
+        window_samples=window_samples,
+        post_pad_samples=post_pad_samples,
+        out_of_range=out_of_range,
+        dtype=dtype,
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _pink_sos(rate):
+    """Second-order sections of a 1/f filter, limited to 20Hz to 20kHz, along
+    with the output RMS for a unit-variance white noise input."""
+
+    # 'pinking' filter from J. O. Smith, 'Spectral Audio Signal Processing'
+    pink_sos = scipy.signal.tf2sos(
+        b=[0.049922035, -0.095993537, 0.050612699, -0.004408786],
+        a=[1, -2.494956002, 2.017265875, -0.522189400],
+    )
+
+    band_sos = [
+        scipy.signal.butter(N=2, Wn=20, btype="highpass", fs=rate, output="sos")
+    ]
+
+    if 20000 < (rate / 2) * 0.95:
+        band_sos.append(
+            scipy.signal.butter(N=8, Wn=20000, btype="lowpass", fs=rate, output="sos")
+        )
+
+    sos = np.concatenate([pink_sos] + band_sos)
+
+    impulse = np.zeros(rate)
+    impulse[0] = 1.0
 
-    y = np.concatenate((y, np.zeros((post_pad_samples, 2))))
+    gain = np.sqrt(np.sum(scipy.signal.sosfilt(sos=sos, x=impulse) ** 2))
+
+    return (sos, gain)
+
+
+def band_noise(
+    dur_s,
+    rms,
+    low_hz,
+    high_hz,
+    notch=False,
+    filename=None,
+    rate=44100,
+    transition_hz=None,
+    window_samples=220,
+    post_pad_samples=0,
+    out_of_range="error",
+    seed=None,
+    dtype="float64",
+    n_channels=2,
+    channel_corr=1.0,
+):
+    """Generates a band-limited (or notched) Gaussian noise waveform.
+
+    Parameters
+    ----------
+    dur_s: float
+        Duration, in seconds.
+    rms: float or sequence of floats
+        Root-mean-square amplitude for each channel.
+    low_hz, high_hz: float or None
+        Lower and upper edges of the band, in Hz. If `low_hz` is ``None``, the
+        noise is low-pass; if `high_hz` is ``None``, it is high-pass.
+    notch: bool, optional
+        If ``True``, the band is removed from (rather than passed by) the noise.
+    filename: string or None, optional
+        If provided, saves the waveform as a 'wav' file.
+    rate: int, optional
+        Sample rate.
+    transition_hz: float or None, optional
+        Width of the transition between the pass and stop bands, in Hz. If
+        ``None``, it is 10% of the narrowest of the band edges and bandwidth.
+    window_samples: int, optional
+        Number of samples to use in a Hanning window at the start and end of
+        the waveform.
+    post_pad_samples: int, optional
+        The number of zeros to append to the waveform.
+    out_of_range: string, {"warn", "error"}, or None, optional
+        What to do if the waveform goes out of range.
+    seed: int or None, optional
+        Seed for the random number generator.
+    dtype: string or numpy dtype, {"float64", "float32", "int16"}, optional
+        Data type of the waveform. It is generated as float32 unless this is
+        "float64", and "int16" waveforms are quantised to the 16-bit range.
+    n_channels: int, optional
+        Number of channels.
+    channel_corr: float or 2D array of floats, optional
+        Correlation between the channels; either a single value for all pairs
+        of channels or a (number of channels x number of channels) correlation
+        matrix.
+
+    Returns
+    -------
+    y : numpy array
+        A 2D array (number of samples x number of channels).
+
+    """
+
+    blocks = band_noise_blocks(
+        dur_s=dur_s,
+        rms=rms,
+        low_hz=low_hz,
+        high_hz=high_hz,
+        notch=notch,
+        rate=rate,
+        transition_hz=transition_hz,
+        window_samples=window_samples,
+        post_pad_samples=post_pad_samples,
+        out_of_range=out_of_range,
+        seed=seed,
+        dtype=dtype,
+        n_channels=n_channels,
+        channel_corr=channel_corr,
+    )
+
+    y = np.concatenate(list(blocks))
 
     if filename is not None:
 
@@ -198,3 +646,336 @@ def pink_noise(
         )
 
     return y
+
+
+def band_noise_blocks(
+    dur_s,
+    rms,
+    low_hz,
+    high_hz,
+    notch=False,
+    block_samples=4096,
+    rate=44100,
+    transition_hz=None,
+    window_samples=220,
+    post_pad_samples=0,
+    out_of_range="error",
+    seed=None,
+    dtype="float64",
+    n_channels=2,
+    channel_corr=1.0,
+):
+    """Generates a band-limited (or notched) Gaussian noise waveform as a
+    sequence of fixed-size blocks.
+
+    The noise is filtered block-by-block with a linear-phase FIR filter, using
+    FFT-based overlap-add, so arbitrarily long waveforms can be generated in
+    constant memory.
+
+    Parameters
+    ----------
+    dur_s: float or None
+        Duration, in seconds. If ``None``, blocks are generated indefinitely
+        (and there is no offset window or padding).
+    rms: float or sequence of floats
+        Root-mean-square amplitude for each channel.
+    low_hz, high_hz: float or None
+        Lower and upper edges of the band, in Hz. If `low_hz` is ``None``, the
+        noise is low-pass; if `high_hz` is ``None``, it is high-pass.
+    notch: bool, optional
+        If ``True``, the band is removed from (rather than passed by) the noise.
+    block_samples: int, optional
+        Number of samples in each block. The final block may be shorter.
+    rate: int, optional
+        Sample rate.
+    transition_hz: float or None, optional
+        Width of the transition between the pass and stop bands, in Hz. If
+        ``None``, it is 10% of the narrowest of the band edges and bandwidth.
+    window_samples: int, optional
+        Number of samples to use in a Hanning window at the start and end of
+        the waveform.
+    post_pad_samples: int, optional
+        The number of zeros to append to the waveform.
+    out_of_range: string, {"warn", "error"}, or None, optional
+        What to do if a block goes out of range.
+    seed: int or None, optional
+        Seed for the random number generator.
+    dtype: string or numpy dtype, {"float64", "float32", "int16"}, optional
+        Data type of the waveform. It is generated as float32 unless this is
+        "float64", and "int16" waveforms are quantised to the 16-bit range.
+    n_channels: int, optional
+        Number of channels.
+    channel_corr: float or 2D array of floats, optional
+        Correlation between the channels; either a single value for all pairs
+        of channels or a (number of channels x number of channels) correlation
+        matrix.
+
+    Returns
+    -------
+    blocks : generator of numpy arrays
+        Each block is a 2D array (number of samples x number of channels).
+
+    Notes
+    -----
+    * The RMS is set from the expected (rather than the realised) output level.
+
+    """
+
+    rand = np.random.RandomState(seed=seed)
+
+    taps = _band_taps(
+        low_hz=low_hz,
+        high_hz=high_hz,
+        notch=notch,
+        rate=rate,
+        transition_hz=transition_hz,
+    )
+
+    gain = np.sqrt(np.sum(taps**2))
+
+    mixing = _channel_mixing(channel_corr=channel_corr, n_channels=n_channels)
+
+    (n_sources, _) = mixing.shape
+
+    ola_filter = _OverlapAddFilter(taps=taps, block_samples=block_samples)
+
+    # run the filter until its output is no longer affected by its onset
+    n_warmup = len(taps) - 1
+
+    while n_warmup > 0:
+        n_block = min(n_warmup, block_samples)
+        ola_filter.process(rand.normal(size=(n_block, n_sources)))
+        n_warmup -= n_block
+
+    def draw(n):
+
+        y = ola_filter.process(rand.normal(size=(n, n_sources)))
+
+        y /= gain
+
+        return _mix_channels(y, mixing=mixing)
+
+    return _iter_blocks(
+        draw=draw,
+        n_samples=None if dur_s is None else int(dur_s * rate),
+        block_samples=block_samples,
+        rms=_channel_levels(rms=rms, n_channels=n_channels),
+        window_samples=window_samples,
+        post_pad_samples=post_pad_samples,
+        out_of_range=out_of_range,
+        dtype=dtype,
+    )
+
+
+def _band_taps(low_hz, high_hz, notch, rate, transition_hz):
+    """Designs the linear-phase FIR filter for band-limited noise."""
+
+    edges = [edge for edge in (low_hz, high_hz) if edge is not None]
+
+    if not edges:
+        raise ValueError("Need at least one of `low_hz` and `high_hz`")
+
+    if transition_hz is None:
+
+        widths = list(edges) + [rate / 2.0 - edges[-1]]
+
+        if len(edges) == 2:
+            widths.append(high_hz - low_hz)
+
+        transition_hz = 0.1 * min(widths)
+
+    (n_taps, beta) = scipy.signal.kaiserord(
+        ripple=60, width=transition_hz / (rate / 2.0)
+    )
+
+    # need an odd number of taps for the filter to pass the Nyquist frequency
+    n_taps += 1 - (n_taps % 2)
+
+    if len(edges) == 2:
+        pass_zero = "bandstop" if notch else "bandpass"
+    elif low_hz is None:
+        pass_zero = "highpass" if notch else "lowpass"
+    else:
+        pass_zero = "lowpass" if notch else "highpass"
+
+    taps = scipy.signal.firwin(
+        numtaps=n_taps,
+        cutoff=edges,
+        window=("kaiser", beta),
+        pass_zero=pass_zero,
+        fs=rate,
+    )
+
+    return taps
+
+
+class _OverlapAddFilter:
+    def __init__(self, taps, block_samples):
+        """FIR filtering of successive blocks (samples x channels), using FFT
+        overlap-add with the filter state carried between blocks."""
+
+        self._n_taps = len(taps)
+
+        self._block_samples = block_samples
+
+        self._n_fft = scipy.fft.next_fast_len(block_samples + self._n_taps - 1)
+
+        self._taps_fft = np.fft.rfft(taps, n=self._n_fft)[:, np.newaxis]
+
+        self._tail = None
+
+    def process(self, block):
+
+        (n_block, n_channels) = block.shape
+
+        if n_block > self._block_samples:
+            raise ValueError("Block is larger than `block_samples`")
+
+        if self._tail is None:
+            self._tail = np.zeros((self._n_taps - 1, n_channels))
+
+        y = np.fft.irfft(
+            np.fft.rfft(block, n=self._n_fft, axis=0) * self._taps_fft,
+            n=self._n_fft,
+            axis=0,
+        )[: n_block + self._n_taps - 1, :]
+
+        y[: self._n_taps - 1, :] += self._tail
+
+        self._tail = y[n_block:, :].copy()
+
+        return y[:n_block, :]
+
+
+def _channel_levels(rms, n_channels):
+    """Converts a single RMS, or one for each channel, into an array with an
+    item per channel."""
+
+    rms = np.array(rms, dtype=float)
+
+    if rms.ndim == 0:
+        rms = np.repeat(rms, n_channels)
+
+    if rms.shape != (n_channels,):
+        raise ValueError(f"Need a single `rms` value or {n_channels:d} values")
+
+    return rms
+
+
+def _channel_mixing(channel_corr, n_channels):
+    """Mixing matrix (number of sources x number of channels) that converts
+    independent unit-variance sources into channels with a given correlation."""
+
+    channel_corr = np.array(channel_corr, dtype=float)
+
+    if channel_corr.ndim == 0:
+
+        # all channels are the same, so only need one source
+        if channel_corr == 1:
+            return np.ones((1, n_channels))
+
+        channel_corr = np.full((n_channels, n_channels), channel_corr)
+        np.fill_diagonal(channel_corr, 1.0)
+
+    if channel_corr.shape != (n_channels, n_channels):
+        raise ValueError("`channel_corr` needs to be (n_channels x n_channels)")
+
+    try:
+        mixing = np.linalg.cholesky(channel_corr).T
+
+    # not positive definite (e.g., some channels are perfectly correlated)
+    except np.linalg.LinAlgError:
+        (eig_vals, eig_vecs) = np.linalg.eigh(channel_corr)
+        mixing = (eig_vecs * np.sqrt(np.clip(eig_vals, a_min=0, a_max=None))).T
+
+    return mixing
+
+
+def _mix_channels(sources, mixing):
+    """Mixes the last axis of `sources` into channels."""
+
+    (n_sources, n_channels) = mixing.shape
+
+    if n_sources == n_channels and np.array_equal(mixing, np.eye(n_channels)):
+        return sources
+
+    return sources @ mixing.astype(sources.dtype, copy=False)
+
+
+def _iter_blocks(
+    draw,
+    n_samples,
+    block_samples,
+    rms,
+    window_samples,
+    post_pad_samples,
+    out_of_range,
+    dtype,
+):
+    """Yields blocks of a waveform, with a Hanning window, RMS scaling, range
+    checks, and zero padding applied across block boundaries.
+
+    `draw` is called with a number of samples and returns a unit-variance
+    (number of samples x channels) array, and `rms` has an item per channel. If
+    `n_samples` is ``None``, the waveform has no end. Each block is converted to
+    `dtype`.
+
+    """
+
+    work_dtype = working_dtype(dtype)
+
+    if window_samples > 0:
+        window = stimtools.utils.hanning_ramp(window_samples)
+
+    if n_samples is None:
+        n_total = None
+    else:
+        n_total = n_samples + post_pad_samples
+
+    i_start = 0
+
+    while n_total is None or i_start < n_total:
+
+        if n_total is None:
+            n_block = block_samples
+            n_signal = n_block
+        else:
+            n_block = min(block_samples, n_total - i_start)
+            n_signal = max(0, min(n_block, n_samples - i_start))
+
+        y = np.zeros((n_block, len(rms)), dtype=work_dtype)
+
+        if n_signal > 0:
+
+            y[:n_signal, :] = draw(n_signal)
+
+            if window_samples > 0:
+
+                i_block = np.arange(i_start, i_start + n_signal)
+
+                onset = i_block < window_samples
+                y[:n_signal, :][onset, :] *= window[i_block[onset], np.newaxis]
+
+                if n_samples is not None:
+                    i_from_end = n_samples - 1 - i_block
+                    offset = i_from_end < window_samples
+                    y[:n_signal, :][offset, :] *= window[i_from_end[offset], np.newaxis]
+
+            y *= rms
+
+            if out_of_range in ("warn", "error"):
+
+                clip_req = np.logical_or(np.any(y < -1), np.any(y > +1))
+
+                if clip_req:
+
+                    if out_of_range == "warn":
+                        warnings.warn("Clipping required")
+                    else:
+                        raise ValueError("Clipping would be required")
+
+            y = np.clip(y, a_min=-1, a_max=1, out=y)
+
+        yield from_float(y, dtype)
+
+        i_start += n_block
@@ -2,8 +2,41 @@ import numpy as np
 
 import scipy.signal
 
-
-def convolve(source, ir):
+from ._dtype import working_dtype, from_float, to_float
+from ._conv import PartitionedConvolver
+
+
+def convolve(source, ir, dtype="float64", block_samples=None):
+    """Convolves a source waveform with an impulse response.
+
+    Parameters
+    ----------
+    source: array of floats or int16
+        Source waveform; 1D or (number of samples x channels).
+    ir: array of floats or int16
+        Impulse response; 1D or (number of samples x channels). If only one of
+        `source` and `ir` is 1D, it is repeated over two channels.
+    dtype: string or numpy dtype, {"float64", "float32", "int16"}, optional
+        Data type of the output. The convolution is done in float32 unless this
+        is "float64", and "int16" output is clipped and quantised to the 16-bit
+        range.
+    block_samples: int or None, optional
+        If provided, the convolution is done in blocks of this many samples
+        using ``PartitionedConvolver``, which needs much less memory for long
+        sources and impulse responses than a single FFT.
+
+    Returns
+    -------
+    y: array
+        The convolved waveform ("full" mode).
+
+    """
+
+    work_dtype = working_dtype(dtype)
+
+    # int16 waveforms are rescaled to [-1, +1]
+    source = to_float(np.asarray(source), dtype=work_dtype)
+    ir = to_float(np.asarray(ir), dtype=work_dtype)
 
     if source.ndim == 1 and ir.ndim == 2:
         source = np.repeat(source[:, np.newaxis], repeats=2, axis=-1)
@@ -11,7 +44,22 @@ def convolve(source, ir):
     if ir.ndim == 1 and source.ndim == 2:
         ir = np.repeat(ir[:, np.newaxis], repeats=2, axis=-1)
 
-    y = scipy.signal.fftconvolve(in1=source, in2=ir, mode="full", axes=0)
+    if block_samples is None:
+        y = scipy.signal.fftconvolve(in1=source, in2=ir, mode="full", axes=0)
+        return from_float(y, dtype)
+
+    convolver = PartitionedConvolver(ir=ir, block_samples=block_samples, dtype=dtype)
+
+    y = np.concatenate(
+        [
+            convolver.process(source[i_start : (i_start + block_samples), ...])
+            for i_start in range(0, len(source), block_samples)
+        ]
+        + [convolver.flush()]
+    )
+
+    if source.ndim == 1 and ir.ndim == 1:
+        y = y[:, 0]
 
     return y
 
@@ -0,0 +1,151 @@
+import collections
+import concurrent.futures
+import inspect
+
+import numpy as np
+
+from ._tone import pure_tone, complex_tone
+from ._noise import pink_noise, white_noise, band_noise
+from ._ops import convolve
+from ._dtype import to_float
+
+
+generators = {
+    "pure_tone": pure_tone,
+    "complex_tone": complex_tone,
+    "pink_noise": pink_noise,
+    "white_noise": white_noise,
+    "band_noise": band_noise,
+    "convolve": convolve,
+}
+
+
+class StimulusQueue:
+    def __init__(self, trial_params, n_ahead=2, executor="thread", max_workers=None):
+        """Generates the waveforms for upcoming trials in the background, so
+        that they are ready to be presented without a delay.
+
+        Parameters
+        ----------
+        trial_params: sequence of dicts
+            The parameters for each trial, in order of presentation. Each has a
+            "generator" item that is either the name of a generator (e.g.,
+            "pink_noise", "pure_tone", "convolve") or a function, and the rest
+            of the items are passed to that generator as keyword arguments. If
+            using a process pool, functions need to be defined at module level.
+        n_ahead: int, optional
+            Number of trials to keep generated (or generating) in advance.
+        executor: string, {"thread", "process"}, optional
+            Whether to generate the waveforms in a pool of threads or of
+            processes.
+        max_workers: int or None, optional
+            Maximum number of threads or processes. If ``None``, it is
+            `n_ahead`.
+
+        Notes
+        -----
+        * Waveforms are returned as float32. Generators that have a `dtype`
+          argument are asked to produce float32 directly (unless the trial
+          parameters specify otherwise).
+
+        Examples
+        --------
+        >>> trial_params = [
+        ...     {"generator": "pink_noise", "dur_s": 1.0, "rms": 0.05, "seed": i}
+        ...     for i in range(100)
+        ... ]
+        >>> with StimulusQueue(trial_params=trial_params) as stim_queue:
+        ...     for _ in range(len(trial_params)):
+        ...         stim_queue.cue_next(player=player)
+        ...         player.play()
+
+        """
+
+        if executor == "thread":
+            executor_class = concurrent.futures.ThreadPoolExecutor
+        elif executor == "process":
+            executor_class = concurrent.futures.ProcessPoolExecutor
+        else:
+            raise ValueError("Unknown `executor`")
+
+        self._executor = executor_class(max_workers=max_workers or n_ahead)
+
+        self._pending = collections.deque(trial_params)
+
+        self._futures = collections.deque()
+
+        for _ in range(n_ahead):
+            self._submit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+
+        if not self._futures:
+            raise StopIteration
+
+        future = self._futures.popleft()
+
+        self._submit()
+
+        return future.result()
+
+    def __len__(self):
+        return len(self._futures) + len(self._pending)
+
+    def cue_next(self, player):
+        """Cues the waveform for the next trial on a player (such as a
+        ``stimtools.audio.hardware.Player``).
+
+        Parameters
+        ----------
+        player: object with a ``cue`` method
+            Player to cue the waveform on.
+
+        Returns
+        -------
+        waveform: 2D array of float32
+            The cued waveform.
+
+        """
+
+        waveform = next(self)
+
+        player.cue(waveform=waveform)
+
+        return waveform
+
+    def close(self):
+        """Stops any generation that has not yet started."""
+        self._pending.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _submit(self):
+
+        if self._pending:
+            params = self._pending.popleft()
+            self._futures.append(self._executor.submit(_generate, params))
+
+
+def _generate(params):
+
+    params = dict(params)
+
+    generator = params.pop("generator")
+
+    if isinstance(generator, str):
+        generator = generators[generator]
+
+    if "dtype" in inspect.signature(generator).parameters:
+        params.setdefault("dtype", "float32")
+
+    waveform = generator(**params)
+
+    return to_float(np.asarray(waveform), dtype="float32")
@@ -0,0 +1,275 @@
+import concurrent.futures
+import csv
+import functools
+import os
+import pathlib
+
+import numpy as np
+
+import scipy.signal
+
+import soundfile
+
+from ._bank import StimulusBank
+from ._dtype import to_float
+from ._stats import RmsTracker, _rms_to_dbfs
+
+
+# centre frequencies (Hz) of the octave bands of the long-term spectrum
+OCTAVE_CENTRES = (63, 125, 250, 500, 1000, 2000, 4000, 8000, 16000)
+
+SUMMARY_FIELDS = (
+    ("sr", int),
+    ("n_samples", int),
+    ("n_channels", int),
+    ("dur_s", float),
+    ("rms", float),
+    ("rms_dbfs", float),
+    ("max_rms_dbfs", float),
+    ("peak", float),
+    ("peak_dbfs", float),
+    ("n_clipped", int),
+    ("dc_offset", float),
+)
+
+
+def qa_report(
+    source,
+    pattern="*.wav",
+    bin_ms=50,
+    clip_level=0.999,
+    nperseg=2048,
+    n_workers=None,
+    csv_path=None,
+):
+    """Computes level, clipping, and spectral statistics for each waveform in
+    a set of stimuli, in parallel.
+
+    Parameters
+    ----------
+    source: string, pathlib.Path, or StimulusBank instance
+        Directory of audio files, or a stimulus bank.
+    pattern: string, optional
+        Glob pattern that identifies the audio files, if `source` is a
+        directory.
+    bin_ms: number, optional
+        Duration of the window used to find the maximum short-term RMS.
+    clip_level: float, optional
+        Absolute sample value at or above which a sample counts as clipped.
+    nperseg: int, optional
+        Segment length of the Welch estimate of the long-term spectrum.
+    n_workers: int or None, optional
+        Number of processes to use. If ``None``, it is the number of CPUs.
+    csv_path: string, pathlib.Path, or None, optional
+        If provided, the report is also written to this path as a CSV file.
+
+    Returns
+    -------
+    report: structured numpy array
+        One row per waveform, with fields "id", then those in
+        ``SUMMARY_FIELDS``, and then the level (dB re. a full-scale sinusoid)
+        in each octave band of ``OCTAVE_CENTRES`` (e.g., "oct_1000_db"; NaN
+        if above the Nyquist frequency). RMS and dBFS values are over all
+        channels, and the peak and clipping are over all samples.
+
+    Examples
+    --------
+    >>> report = qa_report(source="stimuli", csv_path="stimuli_qa.csv")
+    >>> report["id"][report["n_clipped"] > 0]
+
+    """
+
+    if isinstance(source, StimulusBank):
+        items = [(str(source.bank_dir), stim_id) for stim_id in source.ids]
+    else:
+        items = [
+            (None, str(wav_path))
+            for wav_path in sorted(pathlib.Path(source).glob(pattern))
+        ]
+
+    analyse = functools.partial(
+        _analyse_item, bin_ms=bin_ms, clip_level=clip_level, nperseg=nperseg
+    )
+
+    if n_workers is None:
+        n_workers = os.cpu_count()
+
+    # send the items in chunks, so that large sets aren't dominated by the
+    # inter-process overhead
+    chunksize = max(1, len(items) // (8 * n_workers))
+
+    with concurrent.futures.ProcessPoolExecutor(max_workers=n_workers) as executor:
+        rows = list(executor.map(analyse, items, chunksize=chunksize))
+
+    ids = [
+        stim_id if bank_dir is not None else pathlib.Path(stim_id).stem
+        for (bank_dir, stim_id) in items
+    ]
+
+    report = np.empty(len(items), dtype=_report_dtype(ids=ids))
+
+    report["id"] = ids
+
+    for (i_row, row) in enumerate(rows):
+        for (field, value) in row.items():
+            report[field][i_row] = value
+
+    if csv_path is not None:
+        _write_csv(report=report, csv_path=csv_path)
+
+    return report
+
+
+def _report_dtype(ids):
+
+    id_len = max([len(stim_id) for stim_id in ids] + [1])
+
+    return np.dtype(
+        [("id", f"U{id_len:d}")]
+        + list(SUMMARY_FIELDS)
+        + [(f"oct_{centre:d}_db", float) for centre in OCTAVE_CENTRES]
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _open_bank(bank_dir):
+    return StimulusBank(bank_dir=bank_dir)
+
+
+def _analyse_item(item, bin_ms, clip_level, nperseg):
+    """Statistics of one waveform, from a file or a bank."""
+
+    (bank_dir, stim_id) = item
+
+    if bank_dir is None:
+        (waveform, sr) = soundfile.read(file=stim_id, always_2d=True)
+    else:
+        (waveform, sr) = _open_bank(bank_dir).get(stim_id=stim_id, with_sr=True)
+        waveform = to_float(waveform=np.asarray(waveform), dtype="float64")
+
+    if waveform.ndim == 1:
+        waveform = waveform[:, np.newaxis]
+
+    return analyse_waveform(
+        waveform=waveform,
+        sr=sr,
+        bin_ms=bin_ms,
+        clip_level=clip_level,
+        nperseg=nperseg,
+    )
+
+
+def analyse_waveform(waveform, sr, bin_ms=50, clip_level=0.999, nperseg=2048):
+    """Computes the statistics reported by ``qa_report`` for one waveform.
+
+    Parameters
+    ----------
+    waveform: array of floats
+        Waveform; 1D or (number of samples x channels).
+    sr: int
+        Sample rate.
+    bin_ms, clip_level, nperseg:
+        See ``qa_report``.
+
+    Returns
+    -------
+    stats: dict
+        Value of each report field.
+
+    """
+
+    waveform = np.asarray(waveform, dtype=float)
+
+    if waveform.ndim == 1:
+        waveform = waveform[:, np.newaxis]
+
+    (n_samples, n_channels) = waveform.shape
+
+    abs_waveform = np.abs(waveform)
+
+    peak = np.max(abs_waveform) if n_samples else np.nan
+
+    rms = np.sqrt(np.mean(waveform**2)) if n_samples else np.nan
+
+    tracker = RmsTracker(bin_ms=bin_ms, sample_rate=sr, in_dbfs=True)
+
+    (_, short_term_dbfs) = tracker.process(waveform)
+
+    with np.errstate(divide="ignore"):
+        peak_dbfs = 20 * np.log10(peak)
+
+    stats = {
+        "sr": sr,
+        "n_samples": n_samples,
+        "n_channels": n_channels,
+        "dur_s": n_samples / sr,
+        "rms": rms,
+        "rms_dbfs": _rms_to_dbfs(rms),
+        "max_rms_dbfs": np.max(short_term_dbfs) if len(short_term_dbfs) else np.nan,
+        "peak": peak,
+        "peak_dbfs": peak_dbfs,
+        "n_clipped": int(np.sum(abs_waveform >= clip_level)),
+        "dc_offset": np.mean(waveform) if n_samples else np.nan,
+    }
+
+    stats.update(_octave_levels(waveform=waveform, sr=sr, nperseg=nperseg))
+
+    return stats
+
+
+def _octave_levels(waveform, sr, nperseg):
+    """Long-term level in each octave band, from the Welch spectrum averaged
+    over channels."""
+
+    levels = {f"oct_{centre:d}_db": np.nan for centre in OCTAVE_CENTRES}
+
+    if len(waveform) == 0:
+        return levels
+
+    # all channels at once
+    (freqs, psd) = scipy.signal.welch(
+        waveform, fs=sr, nperseg=min(nperseg, len(waveform)), axis=0
+    )
+
+    psd = np.mean(psd, axis=1)
+
+    df = freqs[1] - freqs[0] if len(freqs) > 1 else sr
+
+    centres = np.array(OCTAVE_CENTRES, dtype=float)
+
+    (lower, upper) = (centres / np.sqrt(2), centres * np.sqrt(2))
+
+    in_band = np.logical_and(
+        freqs[np.newaxis, :] >= lower[:, np.newaxis],
+        freqs[np.newaxis, :] < upper[:, np.newaxis],
+    )
+
+    band_power = (in_band * psd[np.newaxis, :]).sum(axis=1) * df
+
+    # relative to a full-scale sinusoid, which has a power of 0.5
+    with np.errstate(divide="ignore"):
+        band_db = 10 * np.log10(band_power / 0.5)
+
+    band_db[upper > sr / 2] = np.nan
+
+    for (centre, level) in zip(OCTAVE_CENTRES, band_db):
+        levels[f"oct_{centre:d}_db"] = level
+
+    return levels
+
+
+def _write_csv(report, csv_path):
+
+    with open(csv_path, "w", newline="") as csv_file:
+
+        writer = csv.writer(csv_file)
+
+        writer.writerow(report.dtype.names)
+
+        for row in report:
+            writer.writerow(
+                [
+                    f"{value:.6g}" if isinstance(value, float) else value
+                    for value in row.tolist()
+                ]
+            )
@@ -0,0 +1,237 @@
+import functools
+import math
+
+import numpy as np
+
+import scipy.signal
+
+
+# the anti-aliasing filter passes up to this proportion of the lower Nyquist
+# frequency
+ROLLOFF = 0.9
+
+# number of zero-crossings of the (lower-rate) sinc on each side of its centre
+ZERO_CROSSINGS = 32
+
+KAISER_BETA = 8.6
+
+
+def resample(x, sr_orig, sr_new, axis=0):
+    """Resamples a waveform, or a batch of waveforms, using a rational-ratio
+    polyphase filter.
+
+    Parameters
+    ----------
+    x: array of floats
+        Waveform(s) to resample.
+    sr_orig: int
+        Sample rate of `x`.
+    sr_new: int
+        Sample rate to convert to.
+    axis: int, optional
+        Axis of `x` that is time; the other axes are resampled independently.
+
+    Returns
+    -------
+    y: array of floats
+        Resampled waveform(s), with ``ceil(n * sr_new / sr_orig)`` samples
+        along `axis`, where `n` is the number of samples in `x`.
+
+    Notes
+    -----
+    * The filter for each ``(sr_orig, sr_new)`` pair is designed once and then
+      reused by subsequent calls.
+
+    """
+
+    x = np.asarray(x)
+
+    if sr_orig == sr_new:
+        return x
+
+    (up, down, h, _) = _polyphase_filter(sr_orig=sr_orig, sr_new=sr_new)
+
+    return scipy.signal.resample_poly(x, up=up, down=down, axis=axis, window=h)
+
+
+class Resampler:
+    def __init__(self, sr_orig, sr_new):
+        """Streaming resampling, using the same filter as ``resample``.
+
+        Parameters
+        ----------
+        sr_orig: int
+            Sample rate of the input blocks.
+        sr_new: int
+            Sample rate to convert to.
+
+        Notes
+        -----
+        * Input blocks can be 1D or (number of samples x channels), and can be
+          of any length; each output block has the same number of dimensions
+          as its input block.
+        * Output lags the input by the filter length, and the final samples
+          are returned by ``flush``. Concatenating the outputs of ``process``
+          and ``flush`` gives the same waveform as ``resample``.
+
+        Examples
+        --------
+        >>> resampler = Resampler(sr_orig=48000, sr_new=44100)
+        >>> out = [resampler.process(block) for block in blocks]
+        >>> out.append(resampler.flush())
+
+        """
+
+        (self.up, self.down, _, self._phases) = _polyphase_filter(
+            sr_orig=sr_orig, sr_new=sr_new
+        )
+
+        self._half_len = _half_len(up=self.up, down=self.down)
+
+        (_, self._n_taps) = self._phases.shape
+
+        self.reset()
+
+    def reset(self):
+        """Clears the resampling state, ready for a new source."""
+
+        # input samples, starting at absolute sample index `_buffer_start`;
+        # samples before the start of the source are zero
+        self._buffer = None
+        self._buffer_start = -self._n_taps
+
+        self._n_in = 0
+
+        # absolute index of the next output sample
+        self._i_out = 0
+
+        self._ndim = None
+
+    def process(self, block):
+        """Resamples the next block of the source.
+
+        Parameters
+        ----------
+        block: array of floats
+            Source samples; 1D or (number of samples x channels).
+
+        Returns
+        -------
+        out_block: array of floats
+            All the output samples that can be computed so far.
+
+        """
+
+        block = np.asarray(block)
+
+        if self._ndim is None:
+            self._ndim = block.ndim
+
+        if block.ndim == 1:
+            block = block[:, np.newaxis]
+
+        if self._buffer is None:
+            self._buffer = np.zeros(
+                (self._n_taps, block.shape[1]), dtype=np.result_type(block, float)
+            )
+
+        self._buffer = np.concatenate((self._buffer, block))
+
+        self._n_in += len(block)
+
+        # the last output that only depends on the samples received so far
+        n_avail = self._buffer_start + len(self._buffer)
+
+        i_out_stop = max(
+            (n_avail * self.up - 1 - self._half_len) // self.down + 1, self._i_out
+        )
+
+        return self._output(i_out_stop=i_out_stop)
+
+    def flush(self):
+        """Returns the remaining output samples and resets the state."""
+
+        if self._buffer is None:
+            return np.zeros(0)
+
+        i_out_stop = -(-self._n_in * self.up // self.down)
+
+        # the input needed to compute the final outputs is zero
+        i_in_stop = ((i_out_stop - 1) * self.down + self._half_len) // self.up + 1
+
+        n_pad = max(i_in_stop - (self._buffer_start + len(self._buffer)), 0)
+
+        self._buffer = np.concatenate(
+            (self._buffer, np.zeros((n_pad, self._buffer.shape[1])))
+        )
+
+        out_block = self._output(i_out_stop=i_out_stop)
+
+        self.reset()
+
+        return out_block
+
+    def _output(self, i_out_stop):
+
+        i_out = np.arange(self._i_out, i_out_stop)
+
+        i_up = i_out * self.down + self._half_len
+
+        # the most recent input sample contributing to each output, and the
+        # filter phase that applies to it
+        i_in_last = i_up // self.up - self._buffer_start
+        i_phase = i_up % self.up
+
+        segments = self._buffer[i_in_last[:, np.newaxis] - np.arange(self._n_taps)]
+
+        out_block = np.einsum("oti,ot->oi", segments, self._phases[i_phase, :])
+
+        self._i_out = i_out_stop
+
+        # discard the input samples that are no longer needed
+        i_in_next = (self._i_out * self.down + self._half_len) // self.up
+        n_discard = max(i_in_next - self._n_taps + 1 - self._buffer_start, 0)
+
+        self._buffer = self._buffer[n_discard:, :]
+        self._buffer_start += n_discard
+
+        if self._ndim == 1:
+            out_block = out_block[:, 0]
+
+        return out_block
+
+
+def _half_len(up, down):
+    return ZERO_CROSSINGS * max(up, down)
+
+
+@functools.lru_cache(maxsize=None)
+def _polyphase_filter(sr_orig, sr_new):
+    """Up and down factors, anti-aliasing filter, and its polyphase
+    decomposition (phases x taps) for a pair of sample rates."""
+
+    gcd = math.gcd(int(sr_orig), int(sr_new))
+
+    (up, down) = (int(sr_new) // gcd, int(sr_orig) // gcd)
+
+    half_len = _half_len(up=up, down=down)
+
+    h = scipy.signal.firwin(
+        2 * half_len + 1,
+        ROLLOFF / max(up, down),
+        window=("kaiser", KAISER_BETA),
+    )
+
+    # `resample_poly` applies the gain of `up` itself, but the streaming
+    # filter needs it built in
+    n_taps = -(-len(h) // up)
+
+    padded = np.zeros(n_taps * up)
+    padded[: len(h)] = h * up
+
+    phases = padded.reshape(n_taps, up).T.copy()
+
+    h.flags.writeable = False
+    phases.flags.writeable = False
+
+    return (up, down, h, phases)
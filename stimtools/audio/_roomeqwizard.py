@@ -1,135 +1,256 @@
+import concurrent.futures
+import functools
+import hashlib
+import pathlib
 import warnings
 
 import numpy as np
 
+from ._atomic import atomic_write
 
-def parse_roomeqwizard_ir_stats_file(stats_path, freq_set=None):
 
-    raw_stats = {}
+# parameters whose values are kept as strings
+STRING_PARAMS = ("BW (octaves)", "reverse/forward/zero phase filtered")
+
+# how REW reports a value that could not be calculated
+MISSING_VALUE = "�"
 
-    with open(stats_path, "r") as stats_file:
 
-        # unimportant first ten header lines
-        _ = [stats_file.readline() for _ in range(11)]
+def parse_roomeqwizard_ir_stats_file(stats_path, freq_set=None, cache_dir=None):
+    """Parses a file of impulse response statistics exported from Room EQ
+    Wizard.
 
-        raw_header = stats_file.readline().strip("\n").replace("Format is ", "")
+    Parameters
+    ----------
+    stats_path: string or pathlib.Path
+        Path to the exported statistics file.
+    freq_set: dict or None, optional
+        Frequencies (values) to report for each filter type (keys; e.g.,
+        "octave"). Frequencies that are not in the file are given NaN values.
+        If ``None``, or a filter type is not present, the frequencies in the
+        file are used.
+    cache_dir: string, pathlib.Path, or None, optional
+        If provided, the parsed file is saved in this directory as a ``.npz``
+        file and is loaded from there on subsequent calls, unless the
+        statistics file has been modified since.
 
-        # this contains all the parameters that will be extracted
-        raw_header = raw_header.split(", ")
+    Returns
+    -------
+    stats: dict
+        For each filter type, a dictionary of parameter values by frequency.
 
-        header = []
+    """
 
-        # need to fix up the multiple 'r' entries in the header
-        for item in raw_header:
+    blocks = _read_stats_blocks(stats_path=stats_path, cache_dir=cache_dir)
 
-            if item == "r":
-                (associated_t60, *_) = header[-1].split(" ")
-                item = associated_t60 + " linearity (r)"
+    stats = {}
 
-            header.append(item)
+    for (filt_type, block) in blocks.items():
 
-        _ = stats_file.readline()
+        filt_stats = {}
 
-        keep_going = True
+        freqs = block["freq (Hz)"]
 
-        while keep_going:
+        if freq_set is None or filt_type not in freq_set:
+            curr_freq_set = freqs
+        else:
+            curr_freq_set = freq_set[filt_type]
 
-            # octave or one-third octave
-            (filt_type, *_) = stats_file.readline().strip("\n").split(" filtered data")
+        # the row of the block for each requested frequency
+        matches = np.isclose(
+            np.asarray(curr_freq_set, dtype=float)[:, np.newaxis],
+            freqs[np.newaxis, :],
+        )
 
-            if filt_type == "":
-                keep_going = False
-                break
+        found = np.any(matches, axis=1)
+        i_rows = np.argmax(matches, axis=1)
 
-            filt_type = filt_type.lower()
+        for param in block.dtype.names:
 
-            filt_stats = {param: [] for param in header}
+            if param == "freq (Hz)":
+                continue
 
-            filt_keep_going = True
+            values = block[param][i_rows]
 
-            while filt_keep_going:
+            if param in STRING_PARAMS:
+                filt_stats[param] = [
+                    value if (is_found and value != MISSING_VALUE) else np.nan
+                    for (value, is_found) in zip(values.tolist(), found)
+                ]
+            else:
+                filt_stats[param] = np.where(found, values, np.nan)
 
-                raw_row = stats_file.readline().strip("\n")
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", category=RuntimeWarning)
+            bad_fit = np.abs(filt_stats["Topt linearity (r)"]) < 0.99
 
-                if raw_row == "":
-                    filt_keep_going = False
-                    break
+        topt_qa = np.array(filt_stats["Topt (s)"])
+        topt_qa[bad_fit] = np.nan
 
-                # separator could be tabs or spaces - replace tabs with spaces
-                row = raw_row.replace("\t", " ").split(" ")
+        filt_stats["Topt qa (s)"] = topt_qa
 
-                for param in header:
+        filt_stats["freq (Hz)"] = curr_freq_set
 
-                    # the linearity ones are a bit annoying because they all have the
-                    # same column label ('r'), and which one they are associated with is
-                    # based on which column they follow
-                    if param.endswith("linearity (r)"):
-                        # work out which T60 measurement this corresponds to
-                        (associated_t60, *_) = param.split(" ")
-                        # determinine the column of the actual T60 value
-                        i_t60 = header.index(associated_t60 + " (s)")
-                        # ... because the associated linearity measure is the one after
-                        i_column = i_t60 + 1
-                    else:
-                        i_column = header.index(param)
+        stats[filt_type] = filt_stats
 
-                    try:
-                        filt_stats[param].append(row[i_column])
+    return stats
 
-                    # sometimes values are not reported - bad fit, presumably
-                    except ValueError:
-                        pass
 
-            raw_stats[filt_type] = filt_stats
+def parse_roomeqwizard_ir_stats_dir(
+    stats_dir, pattern="*.txt", freq_set=None, cache_dir=None, n_workers=None
+):
+    """Parses all the Room EQ Wizard impulse response statistics files in a
+    directory, in parallel.
 
-    # right, now to parse as numbers
-    stats = {}
+    Parameters
+    ----------
+    stats_dir: string or pathlib.Path
+        Directory containing the exported statistics files.
+    pattern: string, optional
+        Glob pattern that identifies the statistics files.
+    freq_set, cache_dir:
+        See ``parse_roomeqwizard_ir_stats_file``.
+    n_workers: int or None, optional
+        Number of processes to parse with. If ``None``, it is the number of
+        CPUs.
 
-    for (filt_type, raw_filt_stats) in raw_stats.items():
+    Returns
+    -------
+    stats: dict
+        The parsed statistics (as returned by
+        ``parse_roomeqwizard_ir_stats_file``) for each file, keyed by filename.
 
-        filt_stats = {}
+    """
 
-        if freq_set is None or filt_type not in freq_set:
-            curr_freq_set = np.array(raw_filt_stats["freq (Hz)"], dtype=np.float)
-        else:
-            curr_freq_set = freq_set[filt_type]
+    stats_paths = sorted(pathlib.Path(stats_dir).glob(pattern))
 
-        freqs = np.array(raw_filt_stats.pop("freq (Hz)"), dtype=np.float)
+    parse = functools.partial(
+        parse_roomeqwizard_ir_stats_file, freq_set=freq_set, cache_dir=cache_dir
+    )
 
-        for (param, param_values) in raw_filt_stats.items():
+    with concurrent.futures.ProcessPoolExecutor(max_workers=n_workers) as executor:
+        all_stats = list(executor.map(parse, stats_paths))
 
-            param_stats = []
+    return {
+        stats_path.name: stats for (stats_path, stats) in zip(stats_paths, all_stats)
+    }
 
-            for freq in curr_freq_set:
 
-                i_freq = np.flatnonzero(np.isclose(freq, freqs))
+def _read_stats_blocks(stats_path, cache_dir):
+    """Filter blocks of a statistics file, as structured arrays, via the
+    cache if requested."""
 
-                if len(i_freq) == 0:
-                    param_stats.append(np.nan)
-                else:
-                    param_value = param_values[i_freq[0]]
-                    if param_value == "�":
-                        param_value = np.nan
-                    param_stats.append(param_value)
+    if cache_dir is None:
+        return _parse_stats_blocks(stats_path=stats_path)
 
-            if param not in ["BW (octaves)", "reverse/forward/zero phase filtered"]:
-                param_stats = np.array(param_stats, dtype=np.float)
+    stats_path = pathlib.Path(stats_path).resolve()
 
-            filt_stats[param] = param_stats
+    cache_dir = pathlib.Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
 
-        extra_param = "Topt qa (s)"
+    key = hashlib.sha1(str(stats_path).encode("utf8")).hexdigest()
 
-        with warnings.catch_warnings():
-            warnings.simplefilter("ignore", category=RuntimeWarning)
-            bad_fit = np.abs(filt_stats["Topt linearity (r)"]) < 0.99
+    cache_path = cache_dir / (key + ".npz")
 
-        topt_qa = np.array(filt_stats["Topt (s)"])
-        topt_qa[bad_fit] = np.nan
+    mtime_ns = stats_path.stat().st_mtime_ns
 
-        filt_stats[extra_param] = topt_qa
+    try:
+        with np.load(cache_path) as cached:
+            if cached["mtime_ns"] == mtime_ns:
+                return {
+                    filt_type: cached["block_" + filt_type]
+                    for filt_type in cached["filt_types"]
+                }
+    except FileNotFoundError:
+        pass
 
-        filt_stats["freq (Hz)"] = curr_freq_set
+    blocks = _parse_stats_blocks(stats_path=stats_path)
 
-        stats[filt_type] = filt_stats
+    with atomic_write(path=cache_path) as cache_file:
+        np.savez(
+            cache_file,
+            mtime_ns=mtime_ns,
+            filt_types=np.array(list(blocks), dtype=str),
+            **{"block_" + filt_type: block for (filt_type, block) in blocks.items()},
+        )
 
-    return stats
+    return blocks
+
+
+def _parse_stats_blocks(stats_path):
+    """Reads each filter block of a statistics file into a structured array,
+    with a field per parameter and a row per frequency."""
+
+    with open(stats_path, "r") as stats_file:
+        lines = stats_file.read().splitlines()
+
+    # unimportant first eleven header lines
+    raw_header = lines[11].replace("Format is ", "")
+
+    # this contains all the parameters that will be extracted
+    raw_header = raw_header.split(", ")
+
+    header = []
+
+    # need to fix up the multiple 'r' entries in the header; each is the
+    # linearity of the T60 measurement in the column before
+    for item in raw_header:
+
+        if item == "r":
+            (associated_t60, *_) = header[-1].split(" ")
+            item = associated_t60 + " linearity (r)"
+
+        header.append(item)
+
+    n_params = len(header)
+
+    blocks = {}
+
+    i_line = 13
+
+    while i_line < len(lines):
+
+        # octave or one-third octave
+        (filt_type, *_) = lines[i_line].split(" filtered data")
+
+        if filt_type == "":
+            break
+
+        i_end = i_line + 1
+
+        while i_end < len(lines) and lines[i_end] != "":
+            i_end += 1
+
+        # separator could be tabs or spaces; values are sometimes not reported
+        # (bad fit, presumably), so short rows are padded
+        rows = [
+            (line.replace("\t", " ").split(" ") + ["nan"] * n_params)[:n_params]
+            for line in lines[(i_line + 1) : i_end]
+        ]
+
+        values = np.array(rows, dtype=str).reshape(-1, n_params)
+
+        block = np.empty(
+            len(values),
+            dtype=[
+                (param, values.dtype if param in STRING_PARAMS else float)
+                for param in header
+            ],
+        )
+
+        for (i_param, param) in enumerate(header):
+
+            param_values = values[:, i_param]
+
+            if param not in STRING_PARAMS:
+                param_values = np.where(
+                    param_values == MISSING_VALUE, "nan", param_values
+                ).astype(float)
+
+            block[param] = param_values
+
+        blocks[filt_type.lower()] = block
+
+        i_line = i_end + 1
+
+    return blocks
@@ -1,38 +1,207 @@
 import numpy as np
 
 
-def rms_over_time(waveform, bin_ms, sample_rate, in_dbfs=False):
-
-    bin_samples = int(sample_rate * (bin_ms / 1_000))
+def rms_over_time(
+    waveform, bin_ms, sample_rate, in_dbfs=False, hop_samples=1, per_channel=False
+):
+    """Computes the RMS within a window that slides over a waveform.
+
+    Parameters
+    ----------
+    waveform: array of floats
+        Waveform; 1D or (number of samples x channels).
+    bin_ms: number
+        Duration of the window, in milliseconds.
+    sample_rate: int
+        Sample rate of `waveform`.
+    in_dbfs: bool, optional
+        Whether to return the RMS in dB relative to full scale.
+    hop_samples: int, optional
+        The RMS is computed for windows centred on every `hop_samples` samples.
+    per_channel: bool, optional
+        If ``True``, the RMS is computed separately for each channel; otherwise,
+        it is computed over all channels.
+
+    Returns
+    -------
+    x: 1D array of floats
+        The time of each window centre, in milliseconds. Windows that extend
+        beyond the waveform are ``np.nan``.
+    rms: array of floats
+        RMS within each window; 1D or, if `per_channel`, (number of windows x
+        channels). Windows that extend beyond the waveform are ``np.nan``.
+
+    Notes
+    -----
+    * The running sums are computed in blocks (via ``RmsTracker``), so the time
+      taken is linear in the number of samples and the memory is independent
+      of the window size.
+
+    """
+
+    if waveform.ndim == 1:
+        waveform = waveform[:, np.newaxis]
+
+    (n_samples, n_channels) = waveform.shape
+
+    tracker = RmsTracker(
+        bin_ms=bin_ms,
+        sample_rate=sample_rate,
+        in_dbfs=in_dbfs,
+        hop_samples=hop_samples,
+        per_channel=per_channel,
+    )
 
-    half_bin = int(bin_samples / 2)
+    block_samples = max(2**16, tracker.bin_samples * 16)
 
-    i_slice = np.arange(bin_samples) - half_bin
+    rms_in_bounds = [
+        tracker.process(waveform[i_start : (i_start + block_samples), :])[1]
+        for i_start in range(0, n_samples, block_samples)
+    ]
 
-    (n_samples, _) = waveform.shape
+    i_centres = np.arange(0, n_samples, hop_samples)
 
-    i_bins = i_slice[np.newaxis, :] + np.arange(n_samples)[:, np.newaxis]
+    i_starts = i_centres - tracker.half_bin
 
     out_of_bounds = np.logical_or(
-        np.any(i_bins < 0, axis=1),
-        np.any(i_bins >= n_samples, axis=1),
+        i_starts < 0, (i_starts + tracker.bin_samples) > n_samples
     )
 
-    i_bins[out_of_bounds, :] = 0
+    if per_channel:
+        rms = np.full((len(i_centres), n_channels), np.nan)
+    else:
+        rms = np.full(len(i_centres), np.nan)
 
-    rms = np.sqrt(np.mean(waveform[i_bins, :] ** 2, axis=(1, 2)))
+    if rms_in_bounds:
+        rms[~out_of_bounds, ...] = np.concatenate(rms_in_bounds)
 
-    if in_dbfs:
+    x = i_centres / sample_rate * 1_000
+    x[out_of_bounds] = np.nan
 
-        # "RMS value of a full-scale sine wave is designated 0 dB FS"
-        ref = 1 / np.sqrt(2)
+    return (x, rms)
 
-        with np.errstate(divide="ignore"):
-            rms = 20 * np.log10(rms / ref)
 
-    rms[out_of_bounds] = np.nan
+class RmsTracker:
+    def __init__(
+        self, bin_ms, sample_rate, in_dbfs=False, hop_samples=1, per_channel=False
+    ):
+        """Computes the RMS within a sliding window over a waveform that is
+        provided in successive blocks (e.g., a long recording or a stream).
 
-    x = np.arange(n_samples) / sample_rate * 1_000
-    x[out_of_bounds] = np.nan
+        Parameters
+        ----------
+        bin_ms: number
+            Duration of the window, in milliseconds.
+        sample_rate: int
+            Sample rate of the waveform.
+        in_dbfs: bool, optional
+            Whether to return the RMS in dB relative to full scale.
+        hop_samples: int, optional
+            The RMS is computed for windows centred on every `hop_samples`
+            samples.
+        per_channel: bool, optional
+            If ``True``, the RMS is computed separately for each channel;
+            otherwise, it is computed over all channels.
 
-    return (x, rms)
+        Notes
+        -----
+        * Only windows that lie entirely within the waveform are reported, and
+          a window is reported once all of its samples have been processed.
+        * Only the squared samples of the current incomplete window are kept
+          between blocks, so the memory use is constant.
+
+        """
+
+        self.sample_rate = sample_rate
+        self.in_dbfs = in_dbfs
+        self.hop_samples = hop_samples
+        self.per_channel = per_channel
+
+        self.bin_samples = int(sample_rate * (bin_ms / 1_000))
+
+        self.half_bin = int(self.bin_samples / 2)
+
+        # the start sample of the first window whose centre is on the hop grid
+        # and that doesn't extend before the waveform
+        first_centre = int(np.ceil(self.half_bin / hop_samples)) * hop_samples
+
+        self._next_start = first_centre - self.half_bin
+
+        self._n_seen = 0
+
+        self._buffer = None
+
+    def process(self, block):
+        """Processes the next block of the waveform.
+
+        Parameters
+        ----------
+        block: array of floats
+            Waveform samples; 1D or (number of samples x channels).
+
+        Returns
+        -------
+        x: 1D array of floats
+            The time of each completed window centre, in milliseconds.
+        rms: array of floats
+            RMS within each completed window; 1D or, if `per_channel`, (number
+            of windows x channels).
+
+        """
+
+        if block.ndim == 1:
+            block = block[:, np.newaxis]
+
+        squared = block.astype(float) ** 2
+
+        if not self.per_channel:
+            squared = np.mean(squared, axis=1, keepdims=True)
+
+        if self._buffer is None:
+            self._buffer = squared[:0, :]
+
+        # global sample index of the first sample in the buffer
+        i_buffer = self._n_seen - len(self._buffer)
+
+        buffer = np.concatenate((self._buffer, squared))
+
+        self._n_seen += len(block)
+
+        i_starts = np.arange(
+            self._next_start, self._n_seen - self.bin_samples + 1, self.hop_samples
+        )
+
+        if len(i_starts) > 0:
+            self._next_start = i_starts[-1] + self.hop_samples
+
+        cum_sum = np.concatenate(
+            (np.zeros((1, buffer.shape[1])), np.cumsum(buffer, axis=0))
+        )
+
+        i_local = i_starts - i_buffer
+
+        bin_sums = cum_sum[i_local + self.bin_samples, :] - cum_sum[i_local, :]
+
+        rms = np.sqrt(np.clip(bin_sums / self.bin_samples, a_min=0, a_max=None))
+
+        if not self.per_channel:
+            rms = rms[:, 0]
+
+        if self.in_dbfs:
+            rms = _rms_to_dbfs(rms)
+
+        # only need to keep the samples from the start of the next window
+        self._buffer = buffer[max(0, self._next_start - i_buffer) :, :]
+
+        x = (i_starts + self.half_bin) / self.sample_rate * 1_000
+
+        return (x, rms)
+
+
+def _rms_to_dbfs(rms):
+
+    # "RMS value of a full-scale sine wave is designated 0 dB FS"
+    ref = 1 / np.sqrt(2)
+
+    with np.errstate(divide="ignore"):
+        return 20 * np.log10(rms / ref)
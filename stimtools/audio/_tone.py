@@ -1,6 +1,6 @@
 from __future__ import absolute_import, print_function, division
 
-import collections
+import collections.abc
 import warnings
 
 import numpy as np
@@ -9,6 +9,8 @@ import soundfile
 
 import stimtools.utils
 
+from ._dtype import working_dtype, from_float
+
 
 def pure_tone(
     freq,
@@ -19,6 +21,7 @@ def pure_tone(
     rate=44100,
     window_samples=220,
     post_pad_samples=0,
+    dtype="float64",
 ):
     """Generates a pure tone waveform.
 
@@ -41,6 +44,9 @@ def pure_tone(
         the waveform.
     post_pad_samples : int, optional
         The number of zeros to append to the waveform.
+    dtype : string or numpy dtype, {"float64", "float32", "int16"}, optional
+        Data type of the waveform. It is generated as float32 unless this is
+        "float64", and "int16" waveforms are quantised to the 16-bit range.
 
     Returns
     -------
@@ -49,7 +55,7 @@ def pure_tone(
 
     """
 
-    if not isinstance(amplitude, (collections.Sequence, np.ndarray)):
+    if not isinstance(amplitude, (collections.abc.Sequence, np.ndarray)):
         amplitude = [amplitude] * 2
 
     amplitude = np.array(amplitude)
@@ -58,12 +64,12 @@ def pure_tone(
 
     x = np.arange(0.0, 1.0, 1.0 / n_samples)
 
-    y = np.sin(2 * np.pi * x * freq * dur_s + phase)
+    y = np.sin(2 * np.pi * x * freq * dur_s + phase).astype(working_dtype(dtype))
 
     if window_samples > 0:
         y = stimtools.utils.apply_hanning(y, window_samples)
 
-    y = np.concatenate((y, np.zeros(post_pad_samples)))
+    y = np.concatenate((y, np.zeros(post_pad_samples, dtype=y.dtype)))
 
     # convert to stereo
     y = np.tile(y[:, np.newaxis], (1, 2))
@@ -76,6 +82,124 @@ def pure_tone(
     if np.all(y[-1, :] != 0):
         warnings.warn("Waveform does not end at 0")
 
+    y = from_float(y, dtype)
+
+    if filename is not None:
+
+        soundfile.write(
+            file=filename, data=y, samplerate=rate, format="WAV", subtype="PCM_16"
+        )
+
+    return y
+
+
+def complex_tone(
+    freqs,
+    dur_s,
+    amplitudes,
+    phases=0.0,
+    filename=None,
+    rate=44100,
+    window_samples=220,
+    post_pad_samples=0,
+    max_chunk_bytes=64 * 1024**2,
+    dtype="float64",
+):
+    """Generates a waveform that is the sum of a set of sinusoids (e.g., a
+    harmonic complex, chord, or tone cloud).
+
+    Parameters
+    ----------
+    freqs: float or sequence of floats
+        Frequency of each component, in Hz.
+    dur_s: float
+        Duration, in seconds.
+    amplitudes: float, sequence of floats, or 2D array of floats
+        Sine wave amplitude of each component. If 2D, it is (number of
+        components x number of channels) and gives the amplitude of each
+        component in each channel.
+    phases: float, sequence of floats, or 2D array of floats, optional
+        Phase of each component, in radians. Can be per-channel, as for
+        `amplitudes`.
+    filename : string or None, optional
+        If provided, saves the waveform as a 'wav' file.
+    rate : int, optional
+        Sample rate.
+    window_samples : int, optional
+        Number of samples to use in a Hanning window at the start and end of
+        the waveform.
+    post_pad_samples : int, optional
+        The number of zeros to append to the waveform.
+    max_chunk_bytes : int, optional
+        Approximate upper limit on the memory used for the per-component
+        sinusoids; the waveform is synthesised in chunks of samples that fit
+        within this limit.
+    dtype : string or numpy dtype, {"float64", "float32", "int16"}, optional
+        Data type of the waveform. It is generated as float32 unless this is
+        "float64", and "int16" waveforms are quantised to the 16-bit range.
+
+    Returns
+    -------
+    y : numpy array of floats
+        A 2D array (number of samples x number of channels). There are two
+        channels unless `amplitudes` or `phases` specifies otherwise.
+
+    """
+
+    freqs = np.atleast_1d(np.array(freqs, dtype=float))
+
+    if freqs.ndim != 1:
+        raise ValueError("`freqs` needs to be 1D")
+
+    (n_components,) = freqs.shape
+
+    amplitudes = np.array(amplitudes, dtype=float)
+    phases = np.array(phases, dtype=float)
+
+    n_channels = 2
+
+    for component_values in (amplitudes, phases):
+        if component_values.ndim == 2:
+            (_, n_channels) = component_values.shape
+
+    amplitudes = _per_component(amplitudes, n_components, n_channels)
+    phases = _per_component(phases, n_components, n_channels)
+
+    # sin(a + b) = sin(a)cos(b) + cos(a)sin(b), so the per-channel phases can be
+    # folded into the weights of the sine and cosine of each component
+    sin_weights = amplitudes * np.cos(phases)
+    cos_weights = amplitudes * np.sin(phases)
+
+    n_samples = int(dur_s * rate)
+
+    y = np.zeros((n_samples + post_pad_samples, n_channels), dtype=working_dtype(dtype))
+
+    # each sample needs a sine and a cosine for each component
+    chunk_samples = max(1, max_chunk_bytes // (2 * n_components * 8))
+
+    for i_chunk_start in range(0, n_samples, chunk_samples):
+
+        i_chunk_end = min(i_chunk_start + chunk_samples, n_samples)
+
+        x = np.arange(i_chunk_start, i_chunk_end) / n_samples
+
+        theta = 2 * np.pi * x[:, np.newaxis] * freqs[np.newaxis, :] * dur_s
+
+        y[i_chunk_start:i_chunk_end, :] = (
+            np.sin(theta) @ sin_weights + np.cos(theta) @ cos_weights
+        )
+
+    if window_samples > 0:
+        stimtools.utils.apply_hanning(y[:n_samples, :], window_samples, axis=0)
+
+    if np.all(y[0, :] != 0):
+        warnings.warn("Waveform does not start at 0")
+
+    if np.all(y[-1, :] != 0):
+        warnings.warn("Waveform does not end at 0")
+
+    y = from_float(y, dtype)
+
     if filename is not None:
 
         soundfile.write(
@@ -83,3 +207,13 @@ def pure_tone(
         )
 
     return y
+
+
+def _per_component(values, n_components, n_channels):
+    """Broadcasts a scalar, per-component, or per-component and per-channel
+    array to (number of components x number of channels)."""
+
+    if values.ndim < 2:
+        values = np.broadcast_to(values, (n_components,))[:, np.newaxis]
+
+    return np.broadcast_to(values, (n_components, n_channels))
@@ -1,15 +1,21 @@
+import concurrent.futures
+import hashlib
+import os
+import pathlib
+import queue
 import subprocess
 import tempfile
-import os
 
 import numpy as np
 
 import soundfile
 
-try:
-    import resampy
-except ImportError:
-    pass
+from ._atomic import atomic_write
+from ._resample import resample
+
+
+# sample rate expected by the tvl calculator
+SR_TVL = 32_000
 
 
 def compute_tvl(wav, db_max, fir_type="midear", sr_orig=None):
@@ -29,11 +35,143 @@ def compute_tvl(wav, db_max, fir_type="midear", sr_orig=None):
 
     Returns
     -------
-    output: (3, 2) array of floats
-        The first axis is ("instantaneous", "short-term average", "long-term
-        average"), and the second axis is ("sones", "phons").
+    output: (number of frames, 3, 2) array of floats
+        The second axis is ("instantaneous", "short-term average", "long-term
+        average"), and the third axis is ("sones", "phons").
     """
 
+    tvl_path = _get_tvl_path()
+
+    (wav, sr_orig) = _read_wav(wav=wav, sr_orig=sr_orig)
+
+    temp_wav_path = tempfile.NamedTemporaryFile(suffix=".wav", delete=False).name
+
+    try:
+        cmd_out = _run_tvl(
+            wav=wav,
+            sr_orig=sr_orig,
+            db_max=db_max,
+            fir_type=fir_type,
+            tvl_path=tvl_path,
+            temp_wav_path=temp_wav_path,
+        )
+
+    finally:
+        os.remove(temp_wav_path)
+
+    output = parse_tvl_output(output=cmd_out)
+
+    return output
+
+
+def compute_tvl_batch(
+    wavs, db_max, fir_type="midear", sr_orig=None, n_workers=None, cache_dir=None
+):
+    """Computes the 'time-varying loudness' of a set of waveforms, running
+    multiple instances of the TVL binary at once.
+
+    Parameters
+    ----------
+    wavs: sequence of strings or numpy arrays
+        Paths to the wav files or the waveforms. Will be resampled if not 32Khz.
+    db_max: number
+        The level (dB SPL) produced by a full-scale sinusoid.
+    fir_type: string, {"midear", "df", "ff"}
+        See the program README for details on what this does.
+    sr_orig: int, sequence of ints, or None, optional
+        Sample rate of the items in `wavs` that are arrays; either a single
+        value or one per item.
+    n_workers: int or None, optional
+        Maximum number of TVL processes to run at once. If ``None``, it is the
+        number of CPUs.
+    cache_dir: string, pathlib.Path, or None, optional
+        If provided, each output is saved in this directory (keyed by a hash of
+        the waveform, sample rate, `db_max`, and `fir_type`) and is loaded from
+        there, rather than recomputed, on subsequent calls.
+
+    Returns
+    -------
+    outputs: list of arrays of floats
+        The output for each item of `wavs`, as returned by ``compute_tvl``.
+
+    """
+
+    tvl_path = _get_tvl_path()
+
+    if n_workers is None:
+        n_workers = os.cpu_count()
+
+    if sr_orig is None or np.ndim(sr_orig) == 0:
+        sr_origs = [sr_orig] * len(wavs)
+    else:
+        sr_origs = list(sr_orig)
+
+    if cache_dir is not None:
+        cache_dir = pathlib.Path(cache_dir)
+        cache_dir.mkdir(parents=True, exist_ok=True)
+
+    # each worker reuses a temporary directory, rather than making a file for
+    # every waveform
+    temp_dirs = [tempfile.TemporaryDirectory() for _ in range(n_workers)]
+
+    free_temp_dirs = queue.Queue()
+
+    for temp_dir in temp_dirs:
+        free_temp_dirs.put(temp_dir.name)
+
+    def compute(wav, wav_sr_orig):
+
+        (wav, wav_sr_orig) = _read_wav(wav=wav, sr_orig=wav_sr_orig)
+
+        if cache_dir is not None:
+
+            key = _tvl_cache_key(
+                wav=wav, sr_orig=wav_sr_orig, db_max=db_max, fir_type=fir_type
+            )
+
+            cache_path = cache_dir / (key + ".npy")
+
+            try:
+                return np.load(cache_path)
+            except FileNotFoundError:
+                pass
+
+        temp_dir = free_temp_dirs.get()
+
+        try:
+            cmd_out = _run_tvl(
+                wav=wav,
+                sr_orig=wav_sr_orig,
+                db_max=db_max,
+                fir_type=fir_type,
+                tvl_path=tvl_path,
+                temp_wav_path=os.path.join(temp_dir, "tvl_input.wav"),
+            )
+        finally:
+            free_temp_dirs.put(temp_dir)
+
+        output = parse_tvl_output(output=cmd_out)
+
+        if cache_dir is not None:
+
+            with atomic_write(path=cache_path) as cache_file:
+                np.save(cache_file, output)
+
+        return output
+
+    try:
+        with concurrent.futures.ThreadPoolExecutor(max_workers=n_workers) as executor:
+            outputs = list(executor.map(compute, wavs, sr_origs))
+
+    finally:
+        for temp_dir in temp_dirs:
+            temp_dir.cleanup()
+
+    return outputs
+
+
+def _get_tvl_path():
+
     try:
         tvl_path = os.environ["TVL_PATH"]
     except KeyError:
@@ -42,42 +180,55 @@ def compute_tvl(wav, db_max, fir_type="midear", sr_orig=None):
             + "environment variable"
         )
 
-    # sample rate expected by the tvl calculator
-    sr_tvl = 32_000
+    return tvl_path
+
+
+def _read_wav(wav, sr_orig):
 
     if not isinstance(wav, np.ndarray):
         (wav, sr_orig) = soundfile.read(wav)
     else:
         assert sr_orig is not None
 
-    if sr_orig != sr_tvl:
+    return (wav, sr_orig)
 
-        wav = resampy.resample(x=wav, sr_orig=sr_orig, sr_new=sr_tvl, axis=0)
 
-    temp_wav_path = tempfile.NamedTemporaryFile(suffix=".wav", delete=False).name
+def _run_tvl(wav, sr_orig, db_max, fir_type, tvl_path, temp_wav_path):
+    """Runs the TVL binary on a waveform, returning its raw output."""
 
-    try:
-        soundfile.write(temp_wav_path, wav, samplerate=sr_tvl, subtype="PCM_16")
+    if sr_orig != SR_TVL:
 
-        cmd = [
-            "wine",
-            "TVLBIN.exe",
-            "-i",
-            temp_wav_path,
-            "-c",
-            "(" + ",".join([f"{db_max:.0f}"] * 2) + ")",
-            "-F",
-            "(" + ",".join([f"{fir_type:s}1.32k"] * 2) + ")",
-        ]
+        wav = resample(x=wav, sr_orig=sr_orig, sr_new=SR_TVL, axis=0)
 
-        cmd_out = subprocess.check_output(cmd, cwd=tvl_path, stderr=subprocess.DEVNULL)
+    soundfile.write(temp_wav_path, wav, samplerate=SR_TVL, subtype="PCM_16")
 
-    finally:
-        os.remove(temp_wav_path)
+    cmd = [
+        "wine",
+        "TVLBIN.exe",
+        "-i",
+        temp_wav_path,
+        "-c",
+        "(" + ",".join([f"{db_max:.0f}"] * 2) + ")",
+        "-F",
+        "(" + ",".join([f"{fir_type:s}1.32k"] * 2) + ")",
+    ]
 
-    output = parse_tvl_output(output=cmd_out)
+    cmd_out = subprocess.check_output(cmd, cwd=tvl_path, stderr=subprocess.DEVNULL)
 
-    return output
+    return cmd_out
+
+
+def _tvl_cache_key(wav, sr_orig, db_max, fir_type):
+
+    wav = np.ascontiguousarray(wav)
+
+    key_hash = hashlib.sha1(wav.tobytes())
+
+    key_hash.update(
+        f"{wav.shape}|{wav.dtype}|{sr_orig}|{db_max:.0f}|{fir_type}".encode("utf8")
+    )
+
+    return key_hash.hexdigest()
 
 
 def parse_tvl_output(output):
@@ -24,6 +24,7 @@ class Player:
         self.cue = self.interface.cue
         self.close = self.interface.close
         self.start = self.interface.start
+        self.play_blocks = getattr(self.interface, "play_blocks", None)
 
     def __enter__(self):
         return self
@@ -4,13 +4,21 @@ import numpy as np
 
 import sounddevice
 
+from .._dtype import from_float, to_float
+
 
 class SoundCard:
-    def __init__(self, **extra_settings):
+    def __init__(self, dtype="float32", **extra_settings):
 
         self._waveform = np.zeros(0)
 
-        self._stream = sounddevice.OutputStream(channels=2, **extra_settings)
+        # waveforms already of this type (e.g., generated with the `dtype`
+        # option) are written to the stream without conversion
+        self._dtype = np.dtype(dtype)
+
+        self._stream = sounddevice.OutputStream(
+            channels=2, dtype=dtype, **extra_settings
+        )
 
         self._status = None
 
@@ -24,13 +32,7 @@ class SoundCard:
 
     def cue(self, waveform):
 
-        if waveform.ndim != 2:
-            waveform = np.repeat(waveform[:, np.newaxis], 2, axis=1)
-
-        if waveform.dtype != np.float32:
-            waveform = waveform.astype("float32")
-
-        self._cued_waveform = waveform
+        self._cued_waveform = self._convert(waveform=waveform)
 
     def play(self, waveform=None, decue=True):
 
@@ -45,6 +47,28 @@ class SoundCard:
         if decue:
             self._cued_waveform = None
 
+    def play_blocks(self, blocks):
+        """Plays a waveform that is provided as a sequence of blocks (such as
+        from ``stimtools.audio.pink_noise_blocks``), without needing to hold it
+        all in memory."""
+
+        for block in blocks:
+            self._stream.write(data=self._convert(waveform=block))
+
+    def _convert(self, waveform):
+
+        if waveform.ndim != 2:
+            waveform = np.repeat(waveform[:, np.newaxis], 2, axis=1)
+
+        if waveform.dtype != self._dtype:
+
+            if self._dtype == np.int16:
+                waveform = from_float(waveform=waveform, dtype=self._dtype)
+            else:
+                waveform = to_float(waveform=waveform, dtype=self._dtype)
+
+        return waveform
+
     def stop(self):
         self._stream.stop()
 
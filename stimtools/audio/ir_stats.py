@@ -1,10 +1,28 @@
+import concurrent.futures
+import functools
+import json
+import os
+import pathlib
+import time
+
 import numpy as np
 import scipy.stats
 
 import soundfile
 
-import brian2
-import brian2hears
+from ._atomic import atomic_write
+from ._gammatone import erbspace, GammatoneFilterbank
+
+
+# seed of the random generator used to estimate kurtosis thresholds
+KURTOSIS_SEED = 0
+
+try:
+    kurtosis_cache_path = pathlib.Path(os.environ["STIMTOOLS_KURTOSIS_CACHE"])
+except KeyError:
+    kurtosis_cache_path = pathlib.Path(
+        "~/.cache/stimtools/kurtosis_thresholds.json"
+    ).expanduser()
 
 
 def get_ir_stats(ir, t_gauss_thresh=None, filt_centres=None, sr=None):
@@ -42,6 +60,230 @@ def get_ir_stats(ir, t_gauss_thresh=None, filt_centres=None, sr=None):
     )
 
 
+def get_ir_stats_batch(
+    wav_paths,
+    store_dir,
+    channel=0,
+    t_gauss_thresh=None,
+    filt_centres=None,
+    n_workers=None,
+    flush_every=16,
+):
+    """Computes ``get_ir_stats`` for a set of IR files in parallel, saving the
+    results as they are completed and skipping files that have already been
+    analysed.
+
+    Parameters
+    ----------
+    wav_paths: sequence of strings
+        Paths to the IR wav files.
+    store_dir: string or pathlib.Path
+        Directory in which the results are stored; created if it doesn't
+        exist. Results are keyed by the absolute path and modification time of
+        each file, so files are re-analysed if they change; they are not keyed
+        by the other parameters, so use a separate directory for each set of
+        parameters.
+    channel: int, optional
+        Which channel of each file to analyse.
+    t_gauss_thresh, filt_centres:
+        See ``get_ir_stats``.
+    n_workers: int or None, optional
+        Number of processes to use. If ``None``, it is the number of CPUs.
+    flush_every: int, optional
+        The number of completed files after which results are saved.
+
+    Returns
+    -------
+    results: dict of arrays
+        Columns of results, with a row for each item in `wav_paths`; see
+        ``load_ir_stats_store``.
+
+    Examples
+    --------
+    >>> db_info = stimtools.db.echo_thief.get_db_info()
+    >>> wav_paths = [loc_info["wav_path"] for loc_info in db_info.values()]
+    >>> results = get_ir_stats_batch(wav_paths=wav_paths, store_dir="et_stats")
+
+    """
+
+    store_dir = pathlib.Path(store_dir)
+    store_dir.mkdir(parents=True, exist_ok=True)
+
+    keys = [
+        (os.path.abspath(wav_path), os.stat(wav_path).st_mtime_ns)
+        for wav_path in wav_paths
+    ]
+
+    done = _ir_stats_store_rows(results=load_ir_stats_store(store_dir=store_dir))
+
+    to_do = sorted(set(key for key in keys if key not in done))
+
+    if to_do:
+
+        analyse = functools.partial(
+            _ir_stats_item,
+            channel=channel,
+            t_gauss_thresh=t_gauss_thresh,
+            filt_centres=filt_centres,
+        )
+
+        pending = []
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=n_workers) as executor:
+
+            futures = [executor.submit(analyse, key) for key in to_do]
+
+            for future in concurrent.futures.as_completed(futures):
+
+                pending.append(future.result())
+
+                if len(pending) >= flush_every:
+                    _write_ir_stats_part(store_dir=store_dir, rows=pending)
+                    pending = []
+
+        if pending:
+            _write_ir_stats_part(store_dir=store_dir, rows=pending)
+
+        done = _ir_stats_store_rows(results=load_ir_stats_store(store_dir=store_dir))
+
+    rows = [done[key] for key in keys]
+
+    return _ir_stats_columns(rows=rows)
+
+
+def load_ir_stats_store(store_dir):
+    """Loads all the results saved by ``get_ir_stats_batch``.
+
+    Parameters
+    ----------
+    store_dir: string or pathlib.Path
+        Directory in which the results are stored.
+
+    Returns
+    -------
+    results: dict of arrays
+        Columns of results, with a row for each analysed file: "path",
+        "mtime_ns", the outputs of ``get_ir_stats`` ("i_crossover", "t_gauss",
+        "t60_by_freq", "t60_broadband", "drr_by_freq", "fit_flags", "ok"), and
+        "error" (empty unless the analysis raised an exception, in which case
+        the other values are NaN or -1). If a file has been analysed more than
+        once, only its most recent result is included.
+
+    """
+
+    part_paths = sorted(pathlib.Path(store_dir).glob("part_*.npz"))
+
+    rows = []
+
+    for part_path in part_paths:
+        with np.load(part_path) as part:
+            columns = {name: part[name] for name in part.files}
+        rows.extend(
+            {name: column[i_row] for (name, column) in columns.items()}
+            for i_row in range(len(columns["path"]))
+        )
+
+    # parts are named in order of writing, so later results take precedence
+    latest = {(str(row["path"]), int(row["mtime_ns"])): row for row in rows}
+
+    return _ir_stats_columns(rows=list(latest.values()))
+
+
+IR_STATS_FIELDS = (
+    "i_crossover",
+    "t_gauss",
+    "t60_by_freq",
+    "t60_broadband",
+    "drr_by_freq",
+    "fit_flags",
+    "ok",
+)
+
+
+def _ir_stats_item(key, channel, t_gauss_thresh, filt_centres):
+    """Runs ``get_ir_stats`` for one file, capturing any error."""
+
+    (wav_path, mtime_ns) = key
+
+    row = {"path": wav_path, "mtime_ns": mtime_ns, "error": ""}
+
+    try:
+        (ir, sr) = load_ir(wav_path=wav_path, channel=channel)
+
+        stats = get_ir_stats(
+            ir=ir, t_gauss_thresh=t_gauss_thresh, filt_centres=filt_centres, sr=sr
+        )
+
+    except Exception as exc:
+        row["error"] = f"{type(exc).__name__}: {exc}"
+        stats = (-1, np.nan, None, np.nan, None, None, False)
+
+    row.update(zip(IR_STATS_FIELDS, stats))
+
+    return row
+
+
+def _ir_stats_columns(rows):
+    """Combines rows of results into columns."""
+
+    columns = {
+        "path": np.array([str(row["path"]) for row in rows], dtype=str),
+        "mtime_ns": np.array([row["mtime_ns"] for row in rows], dtype=np.int64),
+        "i_crossover": np.array([row["i_crossover"] for row in rows], dtype=int),
+        "t_gauss": np.array([row["t_gauss"] for row in rows], dtype=float),
+        "t60_broadband": np.array([row["t60_broadband"] for row in rows], dtype=float),
+        "ok": np.array([row["ok"] for row in rows], dtype=bool),
+        "error": np.array([str(row["error"]) for row in rows], dtype=str),
+    }
+
+    # per-frequency values, which are missing for files that failed
+    def missing(values):
+        return values is None or np.size(values) == 0
+
+    n_freqs = max(
+        [len(row["t60_by_freq"]) for row in rows if not missing(row["t60_by_freq"])]
+        + [0]
+    )
+
+    for (name, fill, dtype) in (
+        ("t60_by_freq", np.nan, float),
+        ("drr_by_freq", np.nan, float),
+        ("fit_flags", -1, int),
+    ):
+        columns[name] = np.array(
+            [
+                np.full(n_freqs, fill) if missing(row[name]) else row[name]
+                for row in rows
+            ],
+            dtype=dtype,
+        ).reshape(len(rows), n_freqs)
+
+    return columns
+
+
+def _ir_stats_store_rows(results):
+    """Rows of stored results, keyed by (path, modification time)."""
+
+    return {
+        (str(path), int(mtime_ns)): {
+            name: column[i_row] for (name, column) in results.items()
+        }
+        for (i_row, (path, mtime_ns)) in enumerate(
+            zip(results["path"], results["mtime_ns"])
+        )
+    }
+
+
+def _write_ir_stats_part(store_dir, rows):
+    """Saves a set of results as a new part of the store."""
+
+    # nanosecond time, so that parts sort in order of writing
+    part_name = f"part_{time.time_ns():020d}_{os.getpid():d}"
+
+    with atomic_write(path=store_dir / (part_name + ".npz")) as part_file:
+        np.savez(part_file, **_ir_stats_columns(rows=rows))
+
+
 def load_ir(wav_path, channel=0, split=False):
     """Load an IR from a wav file.
 
@@ -107,25 +349,7 @@ def calc_t_gauss(ir, sr, win_ms=10, thresh=None, peak_rel=True):
     if thresh is None:
         thresh = get_kurtosis_threshold(win_size=win_size)
 
-    n = len(ir)
-
-    started = False
-
-    kurtosis = np.full(n, np.nan)
-
-    for i_sample in range(n):
-
-        if (i_sample < (win_size / 2)) or ((i_sample + (win_size / 2)) > n):
-            continue
-
-        win_data = ir[(i_sample - win_size // 2) : (i_sample + win_size // 2)]
-
-        if not started and np.all(np.abs(win_data) < 0.1):
-            continue
-        else:
-            started = True
-
-        kurtosis[i_sample] = scipy.stats.kurtosis(win_data)
+    kurtosis = _sliding_kurtosis(ir=ir, win_size=win_size)
 
     with np.errstate(invalid="ignore"):
         gauss_cum = np.nancumsum(kurtosis < thresh)
@@ -155,34 +379,155 @@ def calc_t_gauss(ir, sr, win_ms=10, thresh=None, peak_rel=True):
     return (kurtosis, crossover, t_gauss)
 
 
-def get_kurtosis_threshold(win_size, n_boot=10_000):
+def _sliding_kurtosis(ir, win_size, thresh_amp=0.1, chunk_windows=4096):
+    """Kurtosis within a window centred on each sample, starting from the first
+    window that contains a sample of at least `thresh_amp` in magnitude.
+
+    The windows are strided views of the IR, processed in chunks to bound the
+    memory use. Each window is mean-subtracted before its moments are
+    calculated, as with ``scipy.stats.kurtosis``, so that the low-amplitude
+    tail of the IR isn't swamped by rounding error (as it would be with
+    cumulative sums over the whole IR).
+
+    """
+
+    n = len(ir)
+
+    half_win = win_size // 2
+
+    kurtosis = np.full(n, np.nan)
+
+    # samples whose window lies entirely within the IR
+    i_samples = np.arange(n)
+
+    valid = np.logical_and(
+        i_samples >= (win_size / 2), (i_samples + (win_size / 2)) <= n
+    )
+
+    i_valid = i_samples[valid]
+
+    if len(i_valid) == 0:
+        return kurtosis
+
+    # number of samples above threshold in each window
+    n_above = np.concatenate(([0], np.cumsum(np.abs(ir) >= thresh_amp)))
+
+    above = (n_above[i_valid + half_win] - n_above[i_valid - half_win]) > 0
+
+    if not np.any(above):
+        return kurtosis
+
+    i_valid = i_valid[np.argmax(above) :]
+
+    windows = np.lib.stride_tricks.sliding_window_view(ir, window_shape=2 * half_win)
+
+    for i_chunk in range(0, len(i_valid), chunk_windows):
+
+        i_chunk_samples = i_valid[i_chunk : (i_chunk + chunk_windows)]
+
+        win_data = windows[i_chunk_samples - half_win, :]
+
+        dev = win_data - np.mean(win_data, axis=1, keepdims=True)
+
+        dev_sq = dev**2
+
+        m2 = np.mean(dev_sq, axis=1)
+        m4 = np.mean(dev_sq**2, axis=1)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            kurtosis[i_chunk_samples] = np.where(m2 > 0, m4 / m2**2, np.nan) - 3
+
+    return kurtosis
+
+
+def get_kurtosis_threshold(win_size, n_boot=10_000, percentile=97.5, use_cache=True):
     """Use the distribution of kurtosis of a random noise sample to identify a
-    threshold for unlikelyness."""
+    threshold for unlikelyness.
 
-    draws = np.random.normal(loc=0.0, scale=1.0, size=(win_size, n_boot))
+    The noise is drawn from a generator seeded with ``KURTOSIS_SEED``, so the
+    threshold is reproducible. Thresholds are kept in memory and in a JSON
+    table at ``kurtosis_cache_path`` (which can be set via the
+    ``STIMTOOLS_KURTOSIS_CACHE`` environment variable), so each combination of
+    parameters is only estimated once.
 
-    ks = scipy.stats.kurtosis(a=draws, axis=0)
+    """
+
+    if not use_cache:
+        return _estimate_kurtosis_threshold(
+            win_size=win_size, n_boot=n_boot, percentile=percentile
+        )
+
+    return _cached_kurtosis_threshold(
+        win_size=int(win_size), n_boot=int(n_boot), percentile=float(percentile)
+    )
 
-    thresh = scipy.stats.scoreatpercentile(ks, 97.5)
+
+@functools.lru_cache(maxsize=None)
+def _cached_kurtosis_threshold(win_size, n_boot, percentile):
+
+    key = f"{win_size:d}|{n_boot:d}|{percentile:g}|{KURTOSIS_SEED:d}"
+
+    try:
+        return _read_kurtosis_table()[key]
+    except KeyError:
+        pass
+
+    thresh = _estimate_kurtosis_threshold(
+        win_size=win_size, n_boot=n_boot, percentile=percentile
+    )
+
+    # re-read, in case another process has added to the table in the meantime
+    table = _read_kurtosis_table()
+    table[key] = thresh
+
+    # the table is only an optimisation, so it is fine if it can't be written
+    try:
+        kurtosis_cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with atomic_write(path=kurtosis_cache_path, mode="w") as table_file:
+            json.dump(table, table_file, indent=1, sort_keys=True)
+
+    except OSError:
+        pass
 
     return thresh
 
 
+def _read_kurtosis_table():
+
+    try:
+        with open(kurtosis_cache_path, "r") as table_file:
+            return json.load(table_file)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _estimate_kurtosis_threshold(win_size, n_boot, percentile):
+
+    rand = np.random.default_rng(seed=KURTOSIS_SEED)
+
+    draws = rand.normal(loc=0.0, scale=1.0, size=(win_size, n_boot))
+
+    ks = scipy.stats.kurtosis(a=draws, axis=0)
+
+    thresh = scipy.stats.scoreatpercentile(ks, percentile)
+
+    return float(thresh)
+
+
 def get_filter_centres(low=20, high=16_000, n=33):
 
-    return brian2hears.erbspace(low=low * brian2.Hz, high=high * brian2.Hz, N=n)
+    return erbspace(low=low, high=high, n=n)
 
 
-def get_filter_output(ir, sr, cf=None, dB=False, abs_conv=True):
+def get_filter_output(ir, sr, cf=None, dB=False, abs_conv=True, dtype="float64"):
 
     if cf is None:
         cf = get_filter_centres()
 
-    bs = brian2hears.Sound(data=ir, samplerate=sr * brian2.Hz)
+    bank = GammatoneFilterbank(cf=cf, sr=sr, dtype=dtype)
 
-    bank = brian2hears.Gammatone(source=bs, cf=cf)
-
-    output = bank.process()
+    output = bank.process(ir)
 
     if abs_conv:
         output = np.abs(output)
@@ -193,17 +538,50 @@ def get_filter_output(ir, sr, cf=None, dB=False, abs_conv=True):
     return output
 
 
-def fit_filter_output(filt_out, sr):
+def fit_filter_output(filt_out, sr, n_workers=None):
+    """Fits an exponential decay to the output of each filter.
 
-    n_k = filt_out.shape[1]
+    Parameters
+    ----------
+    filt_out: 2D array of floats
+        Filter output (number of samples x filters).
+    sr: int
+        Sample rate, in Hz.
+    n_workers: int or None, optional
+        If provided, the filters are split over this many processes; otherwise,
+        they are all fit together in this process.
 
-    params = np.full((n_k, 2), np.nan)
+    Returns
+    -------
+    params: 2D array of floats
+        The decay rate (dB/s) and direct-to-reverberant ratio (dB) of each
+        filter.
+    fit_flags: 1D array of ints
+        Convergence flag of each fit, as from ``scipy.optimize.leastsq``.
+    t60: 1D array of floats
+        T60 of each filter.
+    t60_bb: float
+        Broadband T60; the median of `t60`.
 
-    fit_flags = np.full(n_k, np.nan)
+    """
+
+    if n_workers is None:
+        (params, fit_flags) = fit_decays(filt_responses=filt_out, sr=sr)
+
+    else:
+        i_splits = np.array_split(np.arange(filt_out.shape[1]), n_workers)
+
+        with concurrent.futures.ProcessPoolExecutor(max_workers=n_workers) as executor:
+            fit_outs = list(
+                executor.map(
+                    fit_decays,
+                    [filt_out[:, i_split] for i_split in i_splits],
+                    [sr] * len(i_splits),
+                )
+            )
 
-    for i_k in range(n_k):
-        fit_out = fit_decay(filt_out[:, i_k], sr)
-        (params[i_k, :], fit_flags[i_k]) = fit_out
+        params = np.concatenate([split_params for (split_params, _) in fit_outs])
+        fit_flags = np.concatenate([split_flags for (_, split_flags) in fit_outs])
 
     t60 = -(60.0 / params[:, 0])
 
@@ -214,6 +592,167 @@ def fit_filter_output(filt_out, sr):
     return (params, fit_flags, t60, t60_bb)
 
 
+def fit_decays(filt_responses, sr, max_iter=200, ftol=1.49012e-08, xtol=1.49012e-08):
+    """Fits exponential decays (see ``M``) to a set of filter responses at
+    once.
+
+    Each response starts from a log-linear regression of its level against
+    time, and all are then refined together with Levenberg-Marquardt steps;
+    the residuals and Jacobians of all responses are computed together, and
+    each response has its own damping and stops once it has converged.
+
+    Parameters
+    ----------
+    filt_responses: 2D array of floats
+        Responses (number of samples x responses).
+    sr: int
+        Sample rate, in Hz.
+    max_iter: int, optional
+        Maximum number of iterations.
+    ftol, xtol: floats, optional
+        Relative tolerances on the sum of squares and on the parameters, as in
+        ``scipy.optimize.leastsq``.
+
+    Returns
+    -------
+    params: 2D array of floats
+        The decay rate (`phi`; dB/s) and direct-to-reverberant ratio (`drr`;
+        dB) of each response.
+    fit_flags: 1D array of ints
+        1 if the relative reduction in the sum of squares was at most `ftol`,
+        2 if the relative change in the parameters was at most `xtol`, 3 if
+        both, and 5 if `max_iter` was reached.
+
+    """
+
+    filt_responses = np.asarray(filt_responses, dtype=float)
+
+    (n_samples, n_k) = filt_responses.shape
+
+    t = np.arange(n_samples) / float(sr)
+    t_sq = t**2
+
+    # y = exp(c * (phi * t - drr))
+    c = np.log(10) / 20.0
+
+    # closed-form starting point from the level in dB
+    with np.errstate(divide="ignore"):
+        level = 20 * np.log10(filt_responses)
+
+    usable = np.isfinite(level)
+
+    n_usable = np.sum(usable, axis=0)
+
+    level = np.where(usable, level, 0.0)
+    t_usable = np.where(usable, t[:, np.newaxis], 0.0)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        t_mean = np.sum(t_usable, axis=0) / n_usable
+        level_mean = np.sum(level, axis=0) / n_usable
+
+        t_dev = np.where(usable, t[:, np.newaxis] - t_mean, 0.0)
+
+        slope = np.sum(t_dev * (level - level_mean), axis=0) / np.sum(t_dev**2, axis=0)
+
+    intercept = level_mean - slope * t_mean
+
+    params = np.column_stack((slope, -intercept))
+
+    # decays need a negative slope; otherwise, start where `fit_decay` does
+    bad_start = np.logical_not(np.all(np.isfinite(params), axis=1) & (slope < 0))
+    params[bad_start, :] = (-250, 50)
+
+    def model(params):
+        with np.errstate(over="ignore"):
+            return np.exp(c * (params[:, 0] * t[:, np.newaxis] - params[:, 1]))
+
+    def cost(params, responses):
+        with np.errstate(invalid="ignore"):
+            ss = np.sum((model(params) - responses) ** 2, axis=0)
+        # `M` is infinite for a non-decaying response
+        return np.where(params[:, 0] < 0, ss, np.inf)
+
+    curr_cost = cost(params, filt_responses)
+
+    damping = np.full(n_k, 1e-3)
+
+    fit_flags = np.full(n_k, 5)
+
+    active = np.ones(n_k, dtype=bool)
+
+    for _ in range(max_iter):
+
+        if not np.any(active):
+            break
+
+        act_params = params[active, :]
+
+        y = model(act_params)
+
+        resid = y - filt_responses[:, active]
+
+        # the Jacobian with respect to (phi, drr) is c * (t * y, -y), so its
+        # products only need these sums over time
+        y_sq = y**2
+        y_resid = y * resid
+
+        (s_y_sq, s_t_y_sq, s_t_sq_y_sq) = (np.sum(y_sq, axis=0), t @ y_sq, t_sq @ y_sq)
+
+        jtj = c**2 * np.stack(
+            (
+                np.column_stack((s_t_sq_y_sq, -s_t_y_sq)),
+                np.column_stack((-s_t_y_sq, s_y_sq)),
+            ),
+            axis=1,
+        )
+
+        jtr = c * np.column_stack((t @ y_resid, -np.sum(y_resid, axis=0)))
+
+        damped = jtj + damping[active, np.newaxis, np.newaxis] * (
+            jtj * np.eye(2)[np.newaxis, :, :]
+        )
+
+        with np.errstate(invalid="ignore"):
+            step = -np.linalg.solve(damped, jtr[:, :, np.newaxis])[:, :, 0]
+
+        step[~np.all(np.isfinite(step), axis=1), :] = 0.0
+
+        new_params = act_params + step
+
+        new_cost = cost(new_params, filt_responses[:, active])
+
+        old_cost = curr_cost[active]
+
+        improved = new_cost < old_cost
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            f_conv = improved & ((old_cost - new_cost) <= ftol * old_cost)
+            x_conv = np.linalg.norm(step, axis=1) <= xtol * np.linalg.norm(
+                act_params, axis=1
+            )
+
+        i_active = np.flatnonzero(active)
+
+        i_improved = i_active[improved]
+
+        params[i_improved, :] = new_params[improved, :]
+        curr_cost[i_improved] = new_cost[improved]
+
+        damping[i_active] = np.where(
+            improved, damping[i_active] / 10.0, damping[i_active] * 10.0
+        )
+
+        converged = f_conv | x_conv
+
+        fit_flags[i_active[converged]] = (
+            f_conv[converged].astype(int) + 2 * x_conv[converged].astype(int)
+        )
+
+        active[i_active[converged]] = False
+
+    return (params, fit_flags)
+
+
 def fit_decay(filt_response, sr):
 
     t = np.arange(len(filt_response)) / float(sr)
@@ -238,7 +777,7 @@ def M(x, params):
     (phi, drr) = params
 
     if -(60.0 / phi) < 0:
-        return np.Inf
+        return np.inf
 
     y = 10 ** (((phi * x) - drr) / 20.0)
 
@@ -1,11 +1,10 @@
 import os
 
+import numpy as np
+
 import soundfile
 
-try:
-    import librosa
-except ImportError:
-    pass
+import stimtools.audio
 
 try:
     base_path = os.environ["ACE_CORPUS_PATH"]
@@ -42,9 +41,15 @@ def load(filename, new_sr=None):
 
     filename = os.path.join(base_path, filename)
 
-    if new_sr is None:
-        (w, sr) = soundfile.read(file=filename)
-    else:
-        (w, sr) = librosa.load(path=filename, sr=new_sr)
+    (w, sr) = soundfile.read(file=filename)
+
+    if new_sr is not None:
+
+        # resampled waveforms are mixed down to mono
+        if w.ndim > 1:
+            w = np.mean(w, axis=1)
+
+        w = stimtools.audio.resample(x=w, sr_orig=sr, sr_new=new_sr)
+        sr = new_sr
 
     return (w, sr)
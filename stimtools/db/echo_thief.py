@@ -2,7 +2,6 @@ import os
 import collections
 
 import soundfile
-import librosa
 
 import PIL as pillow
 from PIL import Image
@@ -13,6 +12,8 @@ import imageio
 
 import skimage.transform
 
+import stimtools.audio
+
 try:
     import panorama_image_cropper
 except ImportError:
@@ -121,14 +122,11 @@ def load_ir(loc_name, db_info=None, new_sr=None):
     if db_info is None:
         db_info = get_db_info()
 
-    if new_sr is None:
-        (ir, ir_sr) = soundfile.read(file=db_info[loc_name]["wav_path"])
-    else:
-        (ir, ir_sr) = librosa.load(
-            path=db_info[loc_name]["wav_path"], sr=new_sr, mono=False
-        )
+    (ir, ir_sr) = soundfile.read(file=db_info[loc_name]["wav_path"])
 
-        ir = ir.T
+    if new_sr is not None:
+        ir = stimtools.audio.resample(x=ir, sr_orig=ir_sr, sr_new=new_sr, axis=0)
+        ir_sr = new_sr
 
     return (ir, ir_sr)
 
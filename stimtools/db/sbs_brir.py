@@ -3,7 +3,8 @@ import os
 import numpy as np
 
 import soundfile
-import resampy
+
+import stimtools.audio
 
 
 def load_brir(h_pos, d_pos, angle, db_path=None, head_rotation=0):
@@ -81,7 +82,9 @@ def sbs_brir_convolve(
     )
 
     # now to resample
-    wave = resampy.resample(x=wave, sr_orig=brir_sr, sr_new=sample_rate, axis=0)
+    wave = stimtools.audio.resample(
+        x=wave, sr_orig=brir_sr, sr_new=sample_rate, axis=0
+    )
 
     if wav_path is not None:
 
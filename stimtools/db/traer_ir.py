@@ -1,11 +1,10 @@
 import os
 
+import numpy as np
+
 import soundfile
 
-try:
-    import librosa
-except ImportError:
-    pass
+import stimtools.audio
 
 try:
     base_path = os.environ["TRAER_IR_PATH"]
@@ -28,9 +27,15 @@ def load_ir(ir_filename, new_sr=None):
 
     ir_path = os.path.join(base_path, ir_filename)
 
-    if new_sr is None:
-        (ir, ir_sr) = soundfile.read(file=ir_path)
-    else:
-        (ir, ir_sr) = librosa.load(path=ir_path, sr=new_sr)
+    (ir, ir_sr) = soundfile.read(file=ir_path)
+
+    if new_sr is not None:
+
+        # resampled waveforms are mixed down to mono
+        if ir.ndim > 1:
+            ir = np.mean(ir, axis=1)
+
+        ir = stimtools.audio.resample(x=ir, sr_orig=ir_sr, sr_new=new_sr)
+        ir_sr = new_sr
 
     return (ir, ir_sr)
@@ -16,7 +16,7 @@ from ._pf import logistic, logistic_alt, weibull, cnorm, cnorm_alt, cnorm_wrap
 from ._vids import img_seq_to_vid, combine_vids
 from ._exr import write_exr, read_exr
 from ._vid_read import read_frames, read_vid_audio
-from ._wav_env import apply_hanning
+from ._wav_env import apply_hanning, hanning_ramp
 from ._transforms import img_polar_to_cart
 from ._sf_slope import sf_slope
 from ._scramble import scramble_image
@@ -50,6 +50,7 @@ __all__ = [
     "read_exr",
     "read_frames",
     "apply_hanning",
+    "hanning_ramp",
     "img_polar_to_cart",
     "sf_slope",
     "scramble_image",
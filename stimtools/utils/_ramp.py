@@ -1,3 +1,5 @@
+import functools
+
 import numpy as np
 
 
@@ -19,6 +21,12 @@ def raised_cosine(n_peak, n_flank):
         The raised cosine profile. The length is `n_peak` + `n_flank * 2`.
     """
 
+    return _raised_cosine(n_peak=n_peak, n_flank=n_flank).copy()
+
+
+@functools.lru_cache(maxsize=64)
+def _raised_cosine(n_peak, n_flank):
+
     flank_thetas = np.linspace(0.0, np.pi, n_flank, endpoint=False)
 
     flank = -np.cos(flank_thetas)
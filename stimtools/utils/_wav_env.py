@@ -1,47 +1,100 @@
 from __future__ import absolute_import, print_function, division
 
+import functools
+
 import numpy as np
 import numpy.testing as npt
 
 
-def apply_hanning(waveform, window_samples, section="both"):
+def apply_hanning(waveform, window_samples, section="both", axis=None):
     """Applies a Hanning window to a waveform.
 
     Parameters
     ----------
     waveform: array
-        Waveform to apply the window to.
+        Waveform to apply the window to. If it is an integer array (e.g., int16),
+        the windowing is done in floating-point and the result is rounded.
     window_samples: int
         Number of samples in the window (one-sided). This encompassess the (0, 1) range.
     section: string, {"both", "start", "end"}
         Whether to apply the window to the start, end, or both sections of the waveform.
+    axis: int or None, optional
+        The time axis of `waveform`. If ``None``, `waveform` is 1D or (samples x
+        channels) and the output is squeezed. Otherwise, the window is applied
+        along this axis (e.g., ``axis=1`` for a (tokens x samples x channels)
+        batch) and the output has the same shape as `waveform`.
 
     Returns
     -------
     out: array
-        The `waveform` data, after windowing.
+        The `waveform` data, after windowing. The windowing is done in-place.
 
     """
 
     if section not in ["both", "start", "end"]:
         raise ValueError("Unknown `section`")
 
-    if waveform.ndim == 1:
-        waveform = waveform[:, np.newaxis]
+    squeeze = axis is None
 
-    hanning_win = np.hanning((2 * (window_samples - 1)) + 1)
+    if squeeze:
 
-    window = hanning_win[:window_samples][:, np.newaxis]
+        if waveform.ndim == 1:
+            waveform = waveform[:, np.newaxis]
 
-    npt.assert_almost_equal(window[0], 0.0)
-    npt.assert_almost_equal(window[-1], 1.0)
+        axis = 0
+
+    # view with time as the first axis
+    time_first = np.moveaxis(waveform, axis, 0)
+
+    window = hanning_ramp(window_samples)
+
+    window = window.reshape((window_samples,) + (1,) * (time_first.ndim - 1))
 
     if section in ("both", "start"):
-        waveform[:window_samples, :] *= window
+        _scale_in_place(time_first[:window_samples, ...], window)
 
     if section in ("both", "end"):
-        waveform[-window_samples:, :] *= window[::-1]
+        _scale_in_place(time_first[-window_samples:, ...], window[::-1])
 
-    waveform = np.squeeze(waveform)
+    if squeeze:
+        waveform = np.squeeze(waveform)
 
     return waveform
+
+
+def _scale_in_place(samples, ramp):
+
+    if np.issubdtype(samples.dtype, np.integer):
+        # integers can't be multiplied by floats in-place, so the product is
+        # computed in float and then rounded
+        samples[...] = np.round(samples * ramp)
+    else:
+        samples *= ramp
+
+
+@functools.lru_cache(maxsize=64)
+def hanning_ramp(window_samples):
+    """The rising half of a Hanning window, as used by ``apply_hanning``.
+
+    Parameters
+    ----------
+    window_samples: int
+        Number of samples in the window (one-sided). This encompassess the (0, 1) range.
+
+    Returns
+    -------
+    window: read-only array of floats
+        The window, rising from 0 to 1.
+
+    """
+
+    hanning_win = np.hanning((2 * (window_samples - 1)) + 1)
+
+    window = hanning_win[:window_samples]
+
+    npt.assert_almost_equal(window[0], 0.0)
+    npt.assert_almost_equal(window[-1], 1.0)
+
+    window.flags.writeable = False
+
+    return window
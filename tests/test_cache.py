@@ -0,0 +1,22 @@
+import numpy as np
+
+import stimtools.audio
+
+
+def test_key_equivalent_values(tmp_path):
+
+    cache = stimtools.audio.TokenCache(cache_dir=tmp_path)
+
+    params = {"rms": 0.05, "seed": 3}
+
+    assert cache.key("pink_noise", dur_s=1, **params) == cache.key(
+        "pink_noise", dur_s=1.0, **params
+    )
+
+    assert cache.key("pink_noise", dur_s=1.0, dtype="float32", **params) == cache.key(
+        "pink_noise", dur_s=1.0, dtype=np.float32, **params
+    )
+
+    assert cache.key("pink_noise", dur_s=1.0, **params) != cache.key(
+        "pink_noise", dur_s=2.0, **params
+    )
@@ -0,0 +1,45 @@
+import numpy as np
+
+import scipy.signal
+
+import stimtools.audio
+
+
+def test_filterbank_matches_sosfilt():
+
+    sr = 44100
+
+    bank = stimtools.audio.GammatoneFilterbank(
+        cf=stimtools.audio.erbspace(low=20, high=16000, n=33), sr=sr
+    )
+
+    x = np.random.default_rng(seed=1).normal(scale=0.1, size=sr)
+
+    expected = np.stack(
+        [scipy.signal.sosfilt(filter_sos, x) for filter_sos in bank.sos], axis=1
+    )
+
+    tol = 1e-9 * np.max(np.abs(expected))
+
+    assert np.max(np.abs(bank.process(x) - expected)) < tol
+
+    # the state is carried across blocks of any length
+    bank.reset()
+
+    y = np.concatenate([bank.process(part) for part in np.split(x, [1, 3000, 3001])])
+
+    assert np.max(np.abs(y - expected)) < tol
+
+
+def test_filterbank_int16_input():
+
+    bank = stimtools.audio.GammatoneFilterbank(cf=[500, 1000], sr=16000, dtype="int16")
+
+    x = stimtools.audio.white_noise(dur_s=0.1, rms=0.05, seed=1, dtype="int16")[:, 0]
+
+    y = bank.process(x)
+
+    bank.reset()
+
+    assert y.dtype == np.float32
+    assert np.allclose(y, bank.process(x / 32767), atol=1e-5)
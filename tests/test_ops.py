@@ -0,0 +1,85 @@
+import threading
+
+import numpy as np
+
+import stimtools.audio
+from stimtools.audio._dtype import INT16_SCALE
+
+
+def test_convolve_int16_input():
+
+    rng = np.random.default_rng(seed=1)
+
+    source = stimtools.audio.white_noise(dur_s=0.1, rms=0.05, seed=1, dtype="int16")
+    ir = rng.normal(scale=0.05, size=(500, 2)) * np.exp(-np.arange(500) / 100)[:, None]
+
+    expected = stimtools.audio.convolve(source=source / INT16_SCALE, ir=ir)
+
+    for block_samples in (None, 256):
+
+        y = stimtools.audio.convolve(
+            source=source, ir=ir, dtype="float32", block_samples=block_samples
+        )
+        assert np.allclose(y, expected, atol=1e-5)
+
+        y = stimtools.audio.convolve(
+            source=source, ir=ir, dtype="int16", block_samples=block_samples
+        )
+        assert np.max(np.abs(y - expected * INT16_SCALE)) <= 1
+
+
+def test_partitioned_convolver_int16_input():
+
+    rng = np.random.default_rng(seed=2)
+
+    source = stimtools.audio.white_noise(dur_s=0.1, rms=0.05, seed=2, dtype="int16")
+    ir = rng.normal(scale=0.05, size=700) * np.exp(-np.arange(700) / 150)
+
+    ir = np.round(ir * INT16_SCALE).astype(np.int16)
+
+    expected = stimtools.audio.convolve(
+        source=source / INT16_SCALE, ir=ir / INT16_SCALE
+    )
+
+    convolver = stimtools.audio.PartitionedConvolver(
+        ir=ir, block_samples=512, dtype="float32"
+    )
+
+    blocks = [
+        source[i_start : (i_start + 512)] for i_start in range(0, len(source), 512)
+    ]
+
+    y = np.concatenate(list(convolver.stream(blocks=blocks)))
+
+    assert np.allclose(y, expected, atol=1e-5)
+
+
+def test_convolve_batch_int16_input_and_out():
+
+    rng = np.random.default_rng(seed=3)
+
+    sources = [
+        stimtools.audio.white_noise(dur_s=0.05, rms=0.05, seed=seed, dtype="int16")
+        for seed in range(3)
+    ]
+    irs = [rng.normal(scale=0.05, size=n_samples) for n_samples in (200, 400)]
+
+    bank = stimtools.audio.convolve_batch(sources=sources, irs=irs, n_workers=2)
+
+    outputs = {}
+
+    def out(i_source, i_ir, waveform):
+        outputs[(i_source, i_ir, threading.get_ident())] = waveform
+
+    stimtools.audio.convolve_batch(sources=sources, irs=irs, n_workers=2, out=out)
+
+    for (i_source, source) in enumerate(sources):
+        for (i_ir, ir) in enumerate(irs):
+
+            expected = stimtools.audio.convolve(source=source / INT16_SCALE, ir=ir)
+
+            assert np.allclose(bank[i_source][i_ir], expected)
+
+            # `out` is called from this thread
+            key = (i_source, i_ir, threading.get_ident())
+            assert np.array_equal(outputs[key], bank[i_source][i_ir])
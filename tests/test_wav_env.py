@@ -0,0 +1,16 @@
+import numpy as np
+
+import stimtools.audio
+import stimtools.utils
+
+
+def test_apply_hanning_int16():
+
+    waveform = stimtools.audio.pink_noise(dur_s=0.1, rms=0.05, seed=1, dtype="int16")
+
+    expected = stimtools.utils.apply_hanning(waveform.astype(float), 220)
+
+    windowed = stimtools.utils.apply_hanning(waveform.copy(), 220)
+
+    assert windowed.dtype == np.int16
+    assert np.max(np.abs(windowed - expected)) <= 0.5